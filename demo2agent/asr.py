@@ -1,25 +1,99 @@
 from __future__ import annotations
+import functools
+import os
+import time
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import sounddevice as sd
 import soundfile as sf
 
+try:
+    from faster_whisper import WhisperModel  # type: ignore
+except Exception:
+    WhisperModel = None
+
 def record_wav(path: Path, duration_s: int, samplerate: int = 16000) -> None:
+    """
+    Stream microphone input straight to a 16-bit PCM WAV; memory stays constant
+    regardless of duration.
+    """
     path.parent.mkdir(parents=True, exist_ok=True)
-    audio = sd.rec(int(duration_s * samplerate), samplerate=samplerate, channels=1, dtype="float32")
-    sd.wait()
-    sf.write(str(path), audio, samplerate)
-
-def transcribe_faster_whisper(wav_path: Path) -> Optional[List[Dict]]:
-    try:
-        from faster_whisper import WhisperModel  # type: ignore
-    except Exception:
+    with sf.SoundFile(str(path), mode="w", samplerate=samplerate, channels=1, subtype="PCM_16") as wav:
+        def callback(indata, frames, time_info, status) -> None:
+            wav.buffer_write(indata, dtype="int16")
+
+        with sd.InputStream(samplerate=samplerate, channels=1, dtype="int16", callback=callback):
+            time.sleep(duration_s)
+
+@functools.lru_cache(maxsize=4)
+def _get_model(size: str, device: str, compute_type: str):
+    """
+    Load once per (size, device, compute_type); reloading the weights
+    dominates the cost of transcribing short clips.
+    """
+    return WhisperModel(
+        size,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=os.cpu_count() or 0,
+        num_workers=1,
+    )
+
+def _resolve_device(device: Optional[str], compute_type: Optional[str]) -> Tuple[str, str]:
+    """
+    Pick (device, compute_type). With device=None, use CUDA + int8_float16 when a GPU
+    is visible to CTranslate2, else fall back to CPU int8.
+    """
+    if device is None:
+        try:
+            import ctranslate2  # type: ignore
+            device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+        except Exception:
+            device = "cpu"
+    if compute_type is None:
+        compute_type = "int8_float16" if device == "cuda" else "int8"
+    return device, compute_type
+
+def transcribe_faster_whisper(
+    wav_path: Path,
+    model_size: str = "base.en",
+    device: Optional[str] = None,
+    compute_type: Optional[str] = None,
+    language: Optional[str] = "en",
+) -> Optional[List[Dict]]:
+    """
+    Defaults target short English narration. For accented or non-English audio,
+    pass model_size="small"/"medium" (multilingual) and language=None to auto-detect.
+    """
+    if WhisperModel is None:
         return None
 
-    model = WhisperModel("small", device="cpu", compute_type="int8")
-    segments, _ = model.transcribe(str(wav_path), vad_filter=True)
+    model = _get_model(model_size, *_resolve_device(device, compute_type))
+    # Passing language skips the detection forward pass.
+    segments, _ = model.transcribe(str(wav_path), vad_filter=True, language=language)
     out = []
     for s in segments:
         out.append({"t0": float(s.start), "t1": float(s.end), "text": s.text.strip()})
     return out
+
+def transcribe_faster_whisper_batch(
+    wav_paths: List[Path],
+    model_size: str = "base.en",
+    device: Optional[str] = None,
+    compute_type: Optional[str] = None,
+    language: Optional[str] = "en",
+) -> Optional[List[List[Dict]]]:
+    """
+    Transcribe several clips with one resolved model. Each file is decoded and its
+    log-mel features computed once inside model.transcribe.
+    """
+    if WhisperModel is None:
+        return None
+
+    model = _get_model(model_size, *_resolve_device(device, compute_type))
+    results: List[List[Dict]] = []
+    for wav_path in wav_paths:
+        segments, _ = model.transcribe(str(wav_path), vad_filter=True, language=language)
+        results.append([{"t0": float(s.start), "t1": float(s.end), "text": s.text.strip()} for s in segments])
+    return results
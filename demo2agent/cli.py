@@ -4,19 +4,39 @@ import argparse
 import json
 from pathlib import Path
 
-from demo2agent.compiler_llm import Compiler
-from demo2agent.compiler_preprocess import preprocess_video_segments_for_compiler
-from demo2agent.llm_segmenter import segment_video, SegmenterConfig
-from demo2agent.models import DemoTrace, WorkflowSpec
-from demo2agent.util import ensure_dir, read_json
-from demo2agent.executors.web_browser_use import BrowserUseWebExecutor
-from demo2agent.executors.macos_ax_desktop_executor import MacOSAXDesktopExecutor
-from demo2agent.orchestrator import Orchestrator
-from demo2agent.util import write_json
-from demo2agent.recorder import DemoRecorder, RecorderConfig,AudioRecordConfig
+# Heavy imports (cv2, browser-use, PyObjC, pynput, ...) live inside each cmd_* so
+# `--help` and unrelated subcommands don't pay for them.
+
+
+def _validated_marker(workflow_path: Path) -> Path:
+    return workflow_path.with_name(".workflow.validated")
+
+
+def _mark_validated(workflow_path: Path) -> None:
+    _validated_marker(workflow_path).touch()
+
+
+def _load_workflow(workflow_path: Path, strict: bool):
+    """
+    Skip pydantic validation when the marker says this exact workflow.json was already
+    validated (marker newer than the file). --strict always re-validates.
+    """
+    from demo2agent.models import WorkflowSpec, construct_workflow
+    from demo2agent.util import read_json
+
+    data = read_json(workflow_path)
+    marker = _validated_marker(workflow_path)
+    if not strict and marker.exists() and marker.stat().st_mtime >= workflow_path.stat().st_mtime:
+        return construct_workflow(data)
+
+    wf = WorkflowSpec.model_validate(data)
+    _mark_validated(workflow_path)
+    return wf
 
 
 def cmd_segment(args) -> None:
+    from demo2agent.llm_segmenter import segment_video, SegmenterConfig
+
     run_dir = Path(args.run)
     video_path = run_dir / "screen.mp4"
     if not video_path.exists():
@@ -36,6 +56,12 @@ def cmd_segment(args) -> None:
 
 
 def cmd_compile(args) -> None:
+    from demo2agent.compiler_llm import Compiler
+    from demo2agent.compiler_preprocess import preprocess_video_segments_for_compiler
+    from demo2agent.llm_segmenter import segment_video, SegmenterConfig
+    from demo2agent.models import DemoTrace
+    from demo2agent.util import ensure_dir, read_json
+
     run_dir = Path(args.run)
     ensure_dir(run_dir)
 
@@ -93,16 +119,20 @@ def cmd_compile(args) -> None:
 
     workflow_path = compiled_dir / "workflow.json"
     workflow_path.write_text(wf.model_dump_json(indent=2), encoding="utf-8")
+    _mark_validated(workflow_path)
     print(f"Wrote workflow: {workflow_path}")
 
 
 def cmd_run(args) -> None:
+    from demo2agent.orchestrator import Orchestrator
+    from demo2agent.util import write_json
+
     run_dir = Path(args.run)
     workflow_path = run_dir / "compiled" / "workflow.json"
     if not workflow_path.exists():
         raise FileNotFoundError(f"Missing {workflow_path}. Run compile first.")
 
-    wf = WorkflowSpec.model_validate(json.loads(workflow_path.read_text(encoding="utf-8")))
+    wf = _load_workflow(workflow_path, strict=args.strict)
 
     # You want: --text "..." for user_text
     if args.text is not None and args.text.strip():
@@ -122,20 +152,28 @@ def cmd_run(args) -> None:
             'RUN requires user_text. Example: --text "..." or --inputs \'{"user_text":"..."}\''
         )
 
-    # Instantiate your executors + orchestrator (adjust import paths if your repo differs)
-    
-
-    web_exec = BrowserUseWebExecutor()
-    desktop_exec = MacOSAXDesktopExecutor()
+    # Only construct executors the workflow actually uses (browser startup is slow)
+    step_types = {s.type for s in wf.steps}
+    web_exec = None
+    if "WEB" in step_types:
+        from demo2agent.executors.web_browser_use import BrowserUseWebExecutor
+        web_exec = BrowserUseWebExecutor()
+    desktop_exec = None
+    if "DESKTOP" in step_types:
+        from demo2agent.executors.macos_ax_desktop_executor import MacOSAXDesktopExecutor
+        desktop_exec = MacOSAXDesktopExecutor()
 
     orch = Orchestrator(web_exec=web_exec, desktop_exec=desktop_exec)
     ctx = orch.run(wf, inputs)
 
     out_path = run_dir / "compiled" / "run_outputs.json"
-    out_path.write_text(json.dumps(ctx, indent=2, ensure_ascii=False), encoding="utf-8")
+    write_json(out_path, ctx)
     print(f"Wrote run outputs: {out_path}")
 
 def cmd_record(args):
+    from demo2agent.recorder import DemoRecorder, RecorderConfig, AudioRecordConfig
+    from demo2agent.util import ensure_dir, write_json
+
     out = Path(args.out)
     ensure_dir(out)
 
@@ -204,6 +242,11 @@ def main() -> None:
         default=None,
         help='optional JSON string. Example: \'{"user_text":"..."}\'',
     )
+    rp.add_argument(
+        "--strict",
+        action="store_true",
+        help="re-validate workflow.json even if it was already validated at compile time",
+    )
     rp.set_defaults(func=cmd_run)
 
     args = p.parse_args()
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import functools
 import json
 import re
+from collections import deque
 from typing import Any, Dict, Tuple
 
 from pydantic import ValidationError
@@ -9,9 +11,13 @@ from pydantic import ValidationError
 from .executor_specs import get_executor_specs
 from .llm_json import JSONCallConfig, LLMJsonCaller
 from .models import WorkflowSpec
-from .util import iso_now, ensure_dir
+from .util import dumps_json, iso_now, ensure_dir
 
+# Schema generation walks the whole model tree; it never changes at runtime.
+_WORKFLOW_SCHEMA: Dict[str, Any] = WorkflowSpec.model_json_schema()
 
+
+@functools.lru_cache(maxsize=1)
 def _executor_catalog_text() -> str:
     specs = get_executor_specs()
     lines = []
@@ -80,6 +86,9 @@ _SINGLE_BRACE_TOKEN = re.compile(
 
 
 def _normalize_templates_in_str(s: str) -> str:
+    if "{" not in s:
+        return s
+
     def repl(m: re.Match) -> str:
         inner = m.group(1).strip()
         return "{{ " + inner + " }}"
@@ -87,12 +96,26 @@ def _normalize_templates_in_str(s: str) -> str:
 
 
 def _walk_and_normalize(obj: Any) -> Any:
+    """
+    Normalize template strings in place. Iterative (explicit stack) so deeply nested
+    LLM output cannot hit the recursion limit.
+    """
     if isinstance(obj, str):
         return _normalize_templates_in_str(obj)
-    if isinstance(obj, list):
-        return [_walk_and_normalize(x) for x in obj]
-    if isinstance(obj, dict):
-        return {k: _walk_and_normalize(v) for k, v in obj.items()}
+    stack = deque([obj])
+    while stack:
+        container = stack.pop()
+        if isinstance(container, dict):
+            items = container.items()
+        elif isinstance(container, list):
+            items = enumerate(container)
+        else:
+            continue
+        for key, v in list(items):
+            if isinstance(v, str):
+                container[key] = _normalize_templates_in_str(v)
+            elif isinstance(v, (dict, list)):
+                stack.append(v)
     return obj
 
 
@@ -102,7 +125,7 @@ class Compiler:
         self.caller = LLMJsonCaller()
 
     def _validate_workflow(self, data: Dict[str, Any]) -> WorkflowSpec:
-        # Final deterministic normalization
+        # Safety net: raw output is already normalized before json.loads (see preprocess_text)
         data = _walk_and_normalize(data)
         spec = WorkflowSpec.model_validate(data)
         if not spec.created_at_iso or spec.created_at_iso == "1970-01-01T00:00:00Z":
@@ -123,7 +146,7 @@ class Compiler:
         user_payload: Dict[str, Any] = {
             "workflow_name": workflow_name,
             "created_at_iso": iso_now(),
-            "workflow_spec_json_schema": WorkflowSpec.model_json_schema(),
+            "workflow_spec_json_schema": _WORKFLOW_SCHEMA,
             "executor_catalog_text": _executor_catalog_text(),
             "compile_input": compile_input,
         }
@@ -139,8 +162,9 @@ class Compiler:
         spec: WorkflowSpec = self.caller.call_json(
             cfg=JSONCallConfig(model=self.model, retries=2, strict_schema=True),
             system=SYSTEM,
-            user_content=json.dumps(user_payload, ensure_ascii=False),
+            user_content=dumps_json(user_payload),
             validator=validator,
+            preprocess_text=_normalize_templates_in_str,
             extra_repair_instructions=(
                 "Ensure Jinja2 placeholders use double braces {{ ... }} only. "
                 "Do not use single braces { ... }."
@@ -1,13 +1,21 @@
 from __future__ import annotations
 
 import json
+import os
+import queue
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import cv2
 import numpy as np
 
+try:
+    from decord import VideoReader, cpu as decord_cpu  # type: ignore
+except ImportError:
+    VideoReader = None
+
 from demo2agent.models import DemoTrace
 from demo2agent.util import ensure_dir, write_json
 
@@ -58,7 +66,15 @@ def _extract_transcript_text_from_trace(trace: DemoTrace) -> str:
 class PreprocessConfig:
     # Thumbnails for LLM/compiler
     thumb_max_w: int = 640
-    thumb_format: str = "png"
+    thumb_format: str = "jpg"
+    jpeg_quality: int = 80
+
+    # The compiler only consumes thumbnails; full-res frames are opt-in.
+    write_full_frame: bool = False
+
+    # Keyframe writer threads + bounded hand-off queue from the decoder
+    write_workers: int = 4
+    write_queue_size: int = 16
 
     # Evidence extraction: if key_timestamps missing, sample midpoint
     default_keyframes_per_segment: int = 1
@@ -71,30 +87,144 @@ class PreprocessConfig:
 
 def _resize_to_max_width(bgr: np.ndarray, max_w: int) -> np.ndarray:
     h, w = bgr.shape[:2]
-    if w <= max_w:
-        return bgr
     scale = max_w / float(w)
-    return cv2.resize(bgr, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    if scale >= 0.98:
+        return bgr
+    # INTER_AREA only pays off for large downscales; LINEAR is near-identical above 0.5x
+    interp = cv2.INTER_LINEAR if scale >= 0.5 else cv2.INTER_AREA
+    return cv2.resize(bgr, (int(w * scale), int(h * scale)), interpolation=interp)
+
+
+def _imwrite_params(fmt: str, cfg: PreprocessConfig) -> List[int]:
+    if fmt.lower() in ("jpg", "jpeg"):
+        return [int(cv2.IMWRITE_JPEG_QUALITY), int(cfg.jpeg_quality), int(cv2.IMWRITE_JPEG_OPTIMIZE), 1]
+    return []
+
+
+def _write_kf(sid: str, j: int, frame: np.ndarray, evidence_dir: Path, cfg: PreprocessConfig) -> Tuple[Path, Path]:
+    """Write the thumbnail (and optionally the full frame); returns (frame_path, thumb_path)."""
+    params = _imwrite_params(cfg.thumb_format, cfg)
+    thumb_path = evidence_dir / f"{sid}_kf_{j:02d}_thumb.{cfg.thumb_format}"
+    thumb = _resize_to_max_width(frame, cfg.thumb_max_w)
+    cv2.imwrite(str(thumb_path), thumb, params)
+
+    frame_path = thumb_path
+    if cfg.write_full_frame:
+        frame_path = evidence_dir / f"{sid}_kf_{j:02d}.{cfg.thumb_format}"
+        cv2.imwrite(str(frame_path), frame, params)
+    return frame_path, thumb_path
 
 
 def _read_json(path: Path) -> Dict[str, Any]:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
-def _extract_frame_at(video_path: Path, t: float) -> Optional[np.ndarray]:
+def _extract_frames_decord(video_path: Path, wanted: List[Tuple[Any, float]]) -> Dict[Any, np.ndarray]:
+    """
+    Fetch all requested frames with a single decord get_batch() call, which shares
+    decoder state across indices. decord returns RGB; flip to BGR for cv2.imwrite.
+    """
+    vr = VideoReader(str(video_path), ctx=decord_cpu(0))
+    fps = float(vr.get_avg_fps() or 30.0)
+    n = len(vr)
+    keyed = [(key, int(round(t * fps))) for key, t in wanted]
+    keyed = [(key, idx) for key, idx in keyed if 0 <= idx < n]
+    if not keyed:
+        return {}
+    batch = vr.get_batch([idx for _, idx in keyed]).asnumpy()
+    return {key: np.ascontiguousarray(batch[k][..., ::-1]) for k, (key, _) in enumerate(keyed)}
+
+
+def _iter_frames(video_path: Path, wanted: List[Tuple[Any, float]]) -> Iterator[Tuple[Any, np.ndarray]]:
+    """
+    Yield (key, bgr) for every requested (key, t) as soon as it is decoded.
+    Prefers decord when installed; otherwise falls back to one forward pass over
+    the video with OpenCV.
+
+    Seeking per timestamp reopens the container and re-decodes from the previous
+    H.264 keyframe each time; walking forward with grab() and only retrieve()-ing
+    the wanted frames decodes each GOP once.
+    """
+    if not wanted:
+        return
+    if VideoReader is not None:
+        try:
+            batch = _extract_frames_decord(video_path, wanted)
+        except Exception:
+            batch = None
+        if batch is not None:
+            yield from batch.items()
+            return
+
     cap = cv2.VideoCapture(str(video_path))
     if not cap.isOpened():
-        return None
+        return
 
     fps = float(cap.get(cv2.CAP_PROP_FPS) or 30.0)
-    frame_idx = int(round(t * fps))
-    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+    by_idx: Dict[int, List[Any]] = {}
+    for key, t in wanted:
+        idx = int(round(t * fps))
+        # same bounds as the decord path; a negative LLM timestamp must not stall the walk
+        if idx >= 0:
+            by_idx.setdefault(idx, []).append(key)
+    targets = sorted(by_idx)
 
-    ok, frame = cap.read()
-    cap.release()
-    if not ok:
-        return None
-    return frame
+    try:
+        cur = 0
+        ti = 0
+        while ti < len(targets) and cap.grab():
+            if cur >= targets[ti]:
+                ok, frame = cap.retrieve()
+                while ti < len(targets) and cur >= targets[ti]:
+                    if ok:
+                        for key in by_idx[targets[ti]]:
+                            yield key, frame
+                    ti += 1
+            cur += 1
+    finally:
+        cap.release()
+
+
+def _write_keyframes(
+    frames: Iterator[Tuple[Tuple[int, int], np.ndarray]],
+    seg_meta: List[Dict[str, Any]],
+    evidence_dir: Path,
+    cfg: PreprocessConfig,
+) -> Dict[Tuple[int, int], Tuple[Path, Path]]:
+    """
+    Overlap decode (this thread) with resize+imwrite (writer threads). The queue is
+    bounded so a slow encoder backpressures the decoder instead of buffering frames.
+    """
+    q: "queue.Queue[Optional[Tuple[Tuple[int, int], np.ndarray]]]" = queue.Queue(maxsize=cfg.write_queue_size)
+    written: Dict[Tuple[int, int], Tuple[Path, Path]] = {}
+    errors: List[BaseException] = []
+
+    def writer() -> None:
+        while True:
+            item = q.get()
+            if item is None:
+                return
+            (i, j), frame = item
+            try:
+                written[(i, j)] = _write_kf(seg_meta[i - 1]["segment_id"], j, frame, evidence_dir, cfg)
+            except BaseException as e:
+                errors.append(e)
+
+    n_workers = max(1, min(cfg.write_workers, os.cpu_count() or 1))
+    workers = [threading.Thread(target=writer, daemon=True) for _ in range(n_workers)]
+    for w in workers:
+        w.start()
+    try:
+        for key, frame in frames:
+            q.put((key, frame))
+    finally:
+        for _ in workers:
+            q.put(None)
+        for w in workers:
+            w.join()
+    if errors:
+        raise errors[0]
+    return written
 
 
 def preprocess_video_segments_for_compiler(
@@ -130,7 +260,8 @@ def preprocess_video_segments_for_compiler(
     seg_data = _read_json(segments_path)
     segs = list(seg_data.get("segments") or [])
 
-    out_segments: List[Dict[str, Any]] = []
+    seg_meta: List[Dict[str, Any]] = []
+    wanted: List[Tuple[Tuple[int, int], float]] = []
     for i, s in enumerate(segs, start=1):
         sid = str(s.get("id") or f"seg_{i:03d}")
         t_start = float(s.get("t_start") or 0.0)
@@ -144,34 +275,33 @@ def preprocess_video_segments_for_compiler(
             mid = (t_start + t_end) / 2.0
             key_ts = [mid]
 
-        keyframes_out: List[Dict[str, Any]] = []
         for j, t in enumerate(key_ts[: max(1, cfg.default_keyframes_per_segment)], start=1):
-            t = float(t)
-            frame = _extract_frame_at(video_path, t)
-            if frame is None:
-                continue
+            wanted.append(((i, j), float(t)))
 
-            frame_path = evidence_dir / f"{sid}_kf_{j:02d}.{cfg.thumb_format}"
-            thumb_path = evidence_dir / f"{sid}_kf_{j:02d}_thumb.{cfg.thumb_format}"
-
-            cv2.imwrite(str(frame_path), frame)
-            thumb = _resize_to_max_width(frame, cfg.thumb_max_w)
-            cv2.imwrite(str(thumb_path), thumb)
-
-            keyframes_out.append({
-                "t": t,
-                "frame_path": str(frame_path),
-                "thumb_path": str(thumb_path),
-            })
-
-        out_segments.append({
+        seg_meta.append({
             "segment_id": sid,
             "t_start": t_start,
             "t_end": t_end,
             "surface": surface,
             "summary": summary,
-            "keyframes": keyframes_out,
         })
+
+    written = _write_keyframes(_iter_frames(video_path, wanted), seg_meta, evidence_dir, cfg)
+
+    keyframes_by_seg: Dict[int, List[Dict[str, Any]]] = {}
+    for (i, j), t in wanted:
+        if (i, j) not in written:
+            continue
+        frame_path, thumb_path = written[(i, j)]
+        keyframes_by_seg.setdefault(i, []).append({
+            "t": t,
+            "frame_path": str(frame_path),
+            "thumb_path": str(thumb_path),
+        })
+
+    out_segments: List[Dict[str, Any]] = []
+    for i, meta in enumerate(seg_meta, start=1):
+        out_segments.append({**meta, "keyframes": keyframes_by_seg.get(i, [])})
     transcript_text = ""
     if transcript_file_path:
         try:
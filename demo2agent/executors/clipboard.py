@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+# On macOS read/write the pasteboard in-process; pyperclip shells out to pbcopy/pbpaste.
+try:
+    from AppKit import NSPasteboard, NSPasteboardTypeString
+except ImportError:
+    NSPasteboard = None
+
+try:
+    import pyperclip
+except ImportError:
+    pyperclip = None
+
+
+def available() -> bool:
+    return NSPasteboard is not None or pyperclip is not None
+
+
+def paste() -> str:
+    if NSPasteboard is not None:
+        return str(NSPasteboard.generalPasteboard().stringForType_(NSPasteboardTypeString) or "")
+    if pyperclip is not None:
+        return pyperclip.paste()
+    raise RuntimeError("No clipboard backend (install pyobjc on macOS, or pyperclip)")
+
+
+def copy(text: str) -> None:
+    if NSPasteboard is not None:
+        pb = NSPasteboard.generalPasteboard()
+        pb.clearContents()
+        pb.setString_forType_(text, NSPasteboardTypeString)
+        return
+    if pyperclip is not None:
+        pyperclip.copy(text)
+        return
+    raise RuntimeError("No clipboard backend (install pyobjc on macOS, or pyperclip)")
@@ -1,13 +1,75 @@
 from __future__ import annotations
+import functools
+import platform
 import time
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 import pyautogui
 from demo2agent.models import Step
 
-try:
-    import pyperclip
-except ImportError:
-    pyperclip = None
+from demo2agent.executors import clipboard
+
+# We do our own waits; pyautogui's default 0.1 s after every call is pure idle.
+pyautogui.PAUSE = 0
+pyautogui.FAILSAFE = True
+
+IS_MAC = platform.system() == "Darwin"
+_MOD = {
+    "CTRL": "command" if IS_MAC else "ctrl",
+    "CMD": "command",
+    "ALT": "option" if IS_MAC else "alt",
+    "SHIFT": "shift",
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_hotkey(s: str) -> Tuple[str, ...]:
+    """"CTRL+L" -> ("command", "l") on macOS, ("ctrl", "l") elsewhere."""
+    return tuple(_MOD.get(p.strip().upper(), p.strip().lower()) for p in s.split("+"))
+
+# On macOS post Quartz events directly: no pyautogui guards or per-character dispatch.
+macos_keyboard = None
+if IS_MAC:
+    try:
+        from demo2agent.executors import macos_keyboard
+    except ImportError:
+        macos_keyboard = None
+
+
+def _hotkey(*keys: str) -> None:
+    if macos_keyboard is not None:
+        try:
+            macos_keyboard.post_keystroke(list(keys))
+            return
+        except ValueError:
+            pass  # key name the keymap doesn't know; let pyautogui try
+    pyautogui.hotkey(*keys)
+
+
+def _press(key: str) -> None:
+    _hotkey(key)
+
+
+def _write(text: str) -> None:
+    if macos_keyboard is not None:
+        macos_keyboard.type_unicode(text)
+        return
+    pyautogui.write(text, interval=0.01)
+
+_ADDR_BAR = frozenset({("command", "l"), ("ctrl", "l")})
+
+
+def _canonical(hk) -> Tuple[str, ...]:
+    # list form ["cmd","l"] and string form "CMD+L" compare equal
+    return _parse_hotkey(hk if isinstance(hk, str) else "+".join(str(k) for k in hk))
+
+
+def _wait_clipboard_change(before: str, timeout: float = 0.2, interval: float = 0.01) -> str:
+    deadline = time.monotonic() + timeout
+    text = clipboard.paste()
+    while text == before and time.monotonic() < deadline:
+        time.sleep(interval)
+        text = clipboard.paste()
+    return text
 
 class PyAutoGuiDesktopExecutor:
     """
@@ -21,6 +83,14 @@ class PyAutoGuiDesktopExecutor:
         # inputs: { "focus_browser_first": true } - focuses browser window before other actions
         out: Dict[str, Any] = {}
 
+        want_clipboard = bool(step.inputs.get("read_clipboard_after_copy") and clipboard.available())
+        clipboard_before = ""
+        if want_clipboard:
+            try:
+                clipboard_before = clipboard.paste()
+            except Exception:
+                want_clipboard = False
+
         # Focus browser first if specified (for steps that need to interact with browser)
         # This is a hint that we should wait/ensure browser is active - but we can't reliably
         # programmatically focus a window, so we just add a small delay
@@ -32,55 +102,26 @@ class PyAutoGuiDesktopExecutor:
         address_bar_focused = False
         if step.inputs.get("click_address_bar_first"):
             # On macOS, CMD+L focuses the address bar in most browsers
-            pyautogui.hotkey("command", "l")  # macOS address bar shortcut
+            _hotkey("command", "l")  # macOS address bar shortcut
             time.sleep(0.5)  # Give time for address bar to focus
             address_bar_focused = True
 
         # Process hotkeys (skip CMD+L if we already did it above)
-        hotkeys_to_process = step.inputs.get("hotkeys", [])
-        if address_bar_focused:
-            # Filter out duplicate CMD+L hotkeys
-            filtered_hotkeys = []
-            for hk in hotkeys_to_process:
-                if isinstance(hk, list) and len(hk) == 2 and hk[0].lower() in ["command", "cmd"] and hk[1].lower() == "l":
-                    continue  # Skip duplicate CMD+L
-                if isinstance(hk, str) and ("CTRL+L" in hk.upper() or "CMD+L" in hk.upper()):
-                    continue  # Skip duplicate
-                filtered_hotkeys.append(hk)
-            hotkeys_to_process = filtered_hotkeys
-
-        for hk in hotkeys_to_process:
+        for hk in step.inputs.get("hotkeys", []):
             if not hk:
                 continue
             # Convert string keys like "CTRL+L" to tuple format
-            if isinstance(hk, str):
-                parts = hk.upper().split("+")
-                key_parts = []
-                for part in parts:
-                    part = part.strip()
-                    if part == "CTRL":
-                        key_parts.append("command" if pyautogui.platform.system() == "Darwin" else "ctrl")
-                    elif part == "CMD":
-                        key_parts.append("command")
-                    elif part == "ALT":
-                        key_parts.append("option" if pyautogui.platform.system() == "Darwin" else "alt")
-                    elif part == "SHIFT":
-                        key_parts.append("shift")
-                    else:
-                        key_parts.append(part.lower())
-                pyautogui.hotkey(*key_parts)
-            else:
-                pyautogui.hotkey(*hk)
-            time.sleep(0.3)
+            keys = _parse_hotkey(hk) if isinstance(hk, str) else tuple(hk)
+            if address_bar_focused and _canonical(hk) in _ADDR_BAR:
+                continue  # Skip duplicate CMD+L
+            _hotkey(*keys)
 
         if "text" in step.inputs:
-            pyautogui.write(str(step.inputs["text"]), interval=0.01)
-            time.sleep(0.2)
+            _write(str(step.inputs["text"]))
 
         # Support single key presses (e.g., "return", "enter", "space")
         for key in step.inputs.get("keys", []):
-            pyautogui.press(key)
-            time.sleep(0.2)
+            _press(key)
 
         if "click" in step.inputs:
             x, y = step.inputs["click"]
@@ -89,10 +130,10 @@ class PyAutoGuiDesktopExecutor:
         pause_s = float(step.inputs.get("pause_s", 0.2))
         time.sleep(pause_s)
 
-        # Read clipboard if requested
-        if step.inputs.get("read_clipboard_after_copy") and pyperclip:
+        # Read clipboard if requested: the copy lands asynchronously, so wait for it to change
+        if want_clipboard:
             try:
-                clipboard_text = pyperclip.paste()
+                clipboard_text = _wait_clipboard_change(clipboard_before)
                 if "clipboard_text" in (step.outputs_schema or {}):
                     out["clipboard_text"] = clipboard_text
             except Exception:
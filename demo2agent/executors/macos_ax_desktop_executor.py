@@ -1,17 +1,34 @@
 from __future__ import annotations
 
+import functools
 import json
-import subprocess
+import os
 import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import objc
+from AppKit import NSRunningApplication, NSWorkspace
+from Foundation import NSAppleEventDescriptor, NSAppleScript
+from Quartz import (
+    CGWindowListCopyWindowInfo,
+    kCGNullWindowID,
+    kCGWindowLayer,
+    kCGWindowListOptionOnScreenOnly,
+    kCGWindowName,
+    kCGWindowOwnerName,
+)
 
+from demo2agent.executors import clipboard
+from demo2agent.executors.macos_keyboard import parse_keys, post_keystroke, type_unicode
+from demo2agent.llm_cache import JsonDiskCache
 from demo2agent.llm_json import JSONCallConfig, LLMJsonCaller
 from demo2agent.models import Step, DesktopActionPlan
 
 # PyObjC / AX (optional on some setups; keep imports inside try if needed)
 from ApplicationServices import (
     AXUIElementCreateApplication,
+    AXUIElementCreateSystemWide,
     AXUIElementCopyAttributeValue,
     AXUIElementSetAttributeValue,
     AXUIElementPerformAction,
@@ -24,116 +41,196 @@ from ApplicationServices import (
 # AppleScript helpers (Spotlight, keystrokes, paste)
 # ---------------------------------------------------------------------
 
-def _osascript(script: str) -> str:
-    
-    script = script.encode("utf-8").decode("unicode_escape")
-    print(script)
-    p = subprocess.run(
-        ["osascript", "-e", script],
-        capture_output=True,
-        text=True,
-        check=False,
+# AppleScript parameters travel as the direct object of an 'aevt'/'oapp' event,
+# which AppleScript delivers to `on run argv`. No string interpolation/escaping.
+_kAEOpenApplication = int.from_bytes(b"oapp", "big")
+_kCoreEventClass = int.from_bytes(b"aevt", "big")
+_keyDirectObject = int.from_bytes(b"----", "big")
+_kAutoGenerateReturnID = -1
+_kAnyTransactionID = 0
+
+_DEBUG_APPLESCRIPT = bool(os.environ.get("DEMO2AGENT_DEBUG_APPLESCRIPT"))
+
+
+@functools.lru_cache(maxsize=64)
+def _compile(template: str) -> NSAppleScript:
+    """Compile once per template; later calls only dispatch the Apple Event."""
+    script = NSAppleScript.alloc().initWithSource_(template)
+    ok, err = script.compileAndReturnError_(None)
+    if not ok:
+        raise RuntimeError(f"AppleScript compile failed: {err}")
+    return script
+
+
+def _run_compiled(template: str, params: Tuple[str, ...] = ()) -> str:
+    with objc.autorelease_pool():
+        script = _compile(template)
+        if params:
+            argv = NSAppleEventDescriptor.listDescriptor()
+            for i, v in enumerate(params, start=1):
+                argv.insertDescriptor_atIndex_(NSAppleEventDescriptor.descriptorWithString_(v), i)
+            event = NSAppleEventDescriptor.appleEventWithEventClass_eventID_targetDescriptor_returnID_transactionID_(
+                _kCoreEventClass,
+                _kAEOpenApplication,
+                NSAppleEventDescriptor.currentProcessDescriptor(),
+                _kAutoGenerateReturnID,
+                _kAnyTransactionID,
+            )
+            event.setParamDescriptor_forKeyword_(argv, _keyDirectObject)
+            result, err = script.executeAppleEvent_error_(event, None)
+        else:
+            result, err = script.executeAndReturnError_(None)
+        if result is None:
+            raise RuntimeError(f"AppleScript failed: {err}")
+        return (result.stringValue() or "").strip()
+
+
+def _osascript(script: str, *params: str) -> str:
+    if _DEBUG_APPLESCRIPT:
+        print(script, params)
+    return _run_compiled(script, tuple(params))
+
+
+_SPOTLIGHT_LAUNCH = """on run argv
+    tell application "System Events"
+        keystroke (item 1 of argv)
+        key code 36
+    end tell
+end run"""
+
+
+# Minimum pause after posting input, so the target app dequeues the events
+_SETTLE_FLOOR_S = 0.005
+# Fallback settle for typed/pasted text when the focused element exposes no AXValue
+_TEXT_SETTLE_S = 0.2
+
+
+def _wait_until(pred: Callable[[], bool], timeout: float, interval: float = 0.02) -> bool:
+    """Poll pred until it is true or timeout elapses; returns whether it became true."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if pred():
+                return True
+        except Exception:
+            pass
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+
+
+def _frontmost_now() -> str:
+    app = NSWorkspace.sharedWorkspace().frontmostApplication()
+    return str(app.localizedName() or "") if app is not None else ""
+
+
+def _has_window(owner: str) -> bool:
+    infos = CGWindowListCopyWindowInfo(kCGWindowListOptionOnScreenOnly, kCGNullWindowID) or []
+    return any(w.get(kCGWindowOwnerName) == owner for w in infos)
+
+
+def _focus_token() -> Any:
+    err, focused = AXUIElementCopyAttributeValue(
+        AXUIElementCreateSystemWide(), kAXFocusedUIElementAttribute, None
     )
-    if p.returncode != 0:
-        raise RuntimeError(f"osascript failed: {p.stderr.strip()}")
-    return p.stdout.strip()
+    return focused if err == 0 else None
+
+
+def _focused_value() -> Optional[str]:
+    focused = _focus_token()
+    if focused is None:
+        return None
+    err, value = AXUIElementCopyAttributeValue(focused, "AXValue", None)
+    return str(value) if err == 0 and value is not None else None
+
+
+def _wait_text_landed(before: Optional[str], timeout: float) -> None:
+    # Done once the focused field's value changes; without AXValue, settle for a bounded time.
+    if before is None and _focused_value() is None:
+        time.sleep(_TEXT_SETTLE_S)
+        return
+    _wait_until(lambda: _focused_value() != before, timeout=timeout)
 
 
 def _spotlight_open() -> None:
-    # Cmd+Space
+    # Cmd+Space, then wait for the Spotlight panel to appear
     _osascript('tell application "System Events" to key code 49 using {command down}')
-    # allow spotlight UI to appear
-    time.sleep(0.2)
+    _wait_until(lambda: _has_window("Spotlight"), timeout=1.0)
 
 
 def _spotlight_launch(query: str) -> None:
-    # Type query then Enter
-    _osascript(
-        'tell application "System Events"\n'
-        f'  keystroke {json.dumps(query)}\n'
-        "  key code 36\n"  # Enter
-        "end tell"
-    )
-    time.sleep(0.6)
+    # Type query then Enter; done once the launched app takes focus
+    before = _frontmost_now()
+    _osascript(_SPOTLIGHT_LAUNCH, query)
+    _wait_until(lambda: _frontmost_now() != before, timeout=3.0)
 
 
 def _activate_app(app: str) -> None:
-    _osascript(f'tell application {json.dumps(app)} to activate')
-    time.sleep(0.3)
+    _osascript("on run argv\n  tell application (item 1 of argv) to activate\nend run", app)
+    _wait_until(lambda: _frontmost_now() == app, timeout=2.0)
 
 
 def _keystroke(keys: List[str]) -> None:
     """
-    AppleScript/System Events gotcha:
-      keystroke "N" with {command down} becomes Cmd+Shift+N.
-    Therefore: letter keys must be lowercase unless SHIFT is explicitly intended.
-
-    keys example: ["CMD","N"] or ["CMD","SHIFT","n"]
-    We'll normalize letters to lowercase unless user specified SHIFT.
+    keys example: ["CMD","n"] or ["CMD","SHIFT","n"]. Posted as Quartz key events,
+    so letter case never implies SHIFT.
     """
-    mods: List[str] = []
-    key: Optional[str] = None
-
-    want_shift = any(k.upper() == "SHIFT" for k in keys)
-
-    for k in keys:
-        ku = k.upper()
-        if ku in ("CMD", "COMMAND"):
-            mods.append("command down")
-        elif ku in ("CTRL", "CONTROL"):
-            mods.append("control down")
-        elif ku in ("ALT", "OPTION"):
-            mods.append("option down")
-        elif ku == "SHIFT":
-            mods.append("shift down")
-        else:
-            # assume this is the "key"
-            key = k
-
-    if key is None:
-        raise ValueError("keystroke requires a non-modifier key")
-
-    # normalize single-letter alpha keys
-    if len(key) == 1 and key.isalpha() and not want_shift:
-        key = key.lower()
-
-    mods_part = ""
-    if mods:
-        mods_part = " using {" + ", ".join(mods) + "}"
-
-    # Use "keystroke" for characters; supports cmd combos well.
-    _osascript(f'tell application "System Events" to keystroke {json.dumps(key)}{mods_part}')
-    time.sleep(0.1)
+    before = _focus_token()
+    post_keystroke(keys)
+    # Shortcuts that open a window/field move focus; others just get the floor.
+    _wait_until(lambda: _focus_token() != before, timeout=0.1)
 
 
 def _type_text(text: str) -> None:
     # For short strings. For multiline, prefer paste_text.
-    _osascript(f'tell application "System Events" to keystroke {json.dumps(text)}')
-    time.sleep(0.1)
+    before = _focused_value()
+    type_unicode(text)
+    _wait_text_landed(before, timeout=0.5)
 
 
 def _paste_text(text: str) -> None:
-    # Put text on clipboard then paste (Cmd+V)
-    _osascript(f'set the clipboard to {json.dumps(text)}')
-    time.sleep(0.05)
-    _keystroke(["CMD", "v"])
-    time.sleep(0.15)
-
-
+    # Put text on clipboard then paste (Cmd+V). The app reads the pasteboard
+    # asynchronously, so wait for the paste to land before the next copy can clobber it.
+    before = _focused_value()
+    clipboard.copy(text)
+    post_keystroke(["CMD", "v"])
+    _wait_text_landed(before, timeout=1.0)
+
+
+def _ttl_cache(ttl_s: float):
+    """Memoize on args for ttl_s; outputs are read back-to-back, not across steps."""
+    def deco(fn):
+        cache: Dict[Tuple[Any, ...], Tuple[float, Any]] = {}
+
+        @functools.wraps(fn)
+        def wrapper(*args):
+            now = time.monotonic()
+            hit = cache.get(args)
+            if hit is not None and now - hit[0] < ttl_s:
+                return hit[1]
+            val = fn(*args)
+            cache[args] = (now, val)
+            return val
+
+        return wrapper
+    return deco
+
+
+@_ttl_cache(0.1)
 def _frontmost_app_name() -> str:
-    return _osascript(
-        'tell application "System Events" to get name of first application process whose frontmost is true'
-    )
+    return _frontmost_now()
 
 
+@_ttl_cache(0.1)
 def _front_window_title(app_name: str) -> str:
-    # Best-effort: some apps do not expose titles this way
-    try:
-        return _osascript(
-            f'tell application "System Events" to tell process {json.dumps(app_name)} to get title of front window'
-        )
-    except Exception:
-        return ""
+    # Best-effort: some apps do not expose titles (or need Screen Recording permission)
+    infos = CGWindowListCopyWindowInfo(kCGWindowListOptionOnScreenOnly, kCGNullWindowID) or []
+    for w in infos:
+        if w.get(kCGWindowOwnerName) == app_name and w.get(kCGWindowLayer, 0) == 0:
+            title = w.get(kCGWindowName)
+            if title:
+                return str(title)
+    return ""
 
 
 # ---------------------------------------------------------------------
@@ -144,13 +241,26 @@ class AXError(RuntimeError):
     pass
 
 
+@functools.lru_cache(maxsize=32)
+def _scan_pid(app_name: str) -> int:
+    for app in NSWorkspace.sharedWorkspace().runningApplications():
+        if app.localizedName() == app_name:
+            return int(app.processIdentifier())
+    raise AXError(f"No running application named {app_name!r}")
+
+
+def _pid_for(app_name: str) -> int:
+    pid = _scan_pid(app_name)
+    running = NSRunningApplication.runningApplicationWithProcessIdentifier_(pid)
+    if running is None or running.isTerminated():
+        # app quit/relaunched since we cached it
+        _scan_pid.cache_clear()
+        pid = _scan_pid(app_name)
+    return pid
+
+
 def _focused_ui_element(app_name: str):
-    # Find app pid then use AX
-    pid = int(
-        _osascript(
-            f'tell application "System Events" to get unix id of first process whose name is {json.dumps(app_name)}'
-        )
-    )
+    pid = _pid_for(app_name)
     app = AXUIElementCreateApplication(pid)
 
     err, focused = AXUIElementCopyAttributeValue(app, kAXFocusedUIElementAttribute, None)
@@ -175,6 +285,14 @@ def _ax_press(elem) -> None:
 # LLM planner (JSON-only)
 # ---------------------------------------------------------------------
 
+# pydantic rebuilds the schema on every model_json_schema() call; a module constant
+# also lets LLMJsonCaller reuse its cached `text` param across plans and retries.
+_DESKTOP_PLAN_SCHEMA: Dict[str, Any] = DesktopActionPlan.model_json_schema()
+
+# Same (model, prompt, task payload) -> same plan; DEMO2AGENT_PLAN_CACHE=off to bypass
+_PLAN_CACHE = JsonDiskCache("plans", env_var="DEMO2AGENT_PLAN_CACHE")
+
+
 @dataclass
 class DesktopPlannerConfig:
     model: str = "gpt-5.2"
@@ -211,10 +329,7 @@ Rules:
 - Keep the plan short (<= max_actions).
 - Prefer keyboard shortcuts over clicking.
 - For multi-line structured content, use paste_text.
-- CRITICAL KEYBOARD RULE (AppleScript/System Events):
-  AppleScript treats uppercase letters as if SHIFT is held.
-  Therefore: ALWAYS output letter keys as lowercase single characters ("n", "v", "t", etc.)
-  unless SHIFT is explicitly required (include "SHIFT" in keys).
+- In keystroke keys, include "SHIFT" explicitly when it is intended; letter case alone never adds it.
 - If the task specifies a title AND separate body content, produce paste_text that places:
   Title on the first line, then a blank line, then body text. (Generic rule; not app-specific.)
 - Output JSON only. No markdown.
@@ -226,29 +341,23 @@ Rules:
 def _validate_planner_output(data: Dict[str, Any], max_actions: int) -> Dict[str, Any]:
     if not isinstance(data, dict):
         raise ValueError("Planner output must be an object")
+    # per-type required fields (model_validator); ValidationError is a ValueError
+    DesktopActionPlan.model_validate(data)
     actions = data.get("actions")
     if not isinstance(actions, list) or not actions:
         raise ValueError("Planner output must include non-empty actions list")
     if len(actions) > max_actions:
         raise ValueError(f"Too many actions: {len(actions)} > {max_actions}")
 
-    # Enforce lowercase letter keys unless SHIFT explicitly requested
     for a in actions:
         if not isinstance(a, dict):
             raise ValueError("Each action must be an object")
-        t = a.get("type")
-        if t == "keystroke":
+        if a.get("type") == "keystroke":
             keys = a.get("keys")
             if not isinstance(keys, list) or not keys:
                 raise ValueError("keystroke requires keys array")
-            want_shift = any(str(k).upper() == "SHIFT" for k in keys)
-            # find final non-modifier key
-            for k in keys:
-                ku = str(k).upper()
-                if ku in ("CMD", "COMMAND", "CTRL", "CONTROL", "ALT", "OPTION", "SHIFT"):
-                    continue
-                if len(str(k)) == 1 and str(k).isalpha() and not want_shift and str(k) != str(k).lower():
-                    raise ValueError("Letter keystroke keys must be lowercase unless SHIFT is explicitly included")
+            # Letter case is irrelevant to Quartz; only check the keys resolve.
+            parse_keys([str(k) for k in keys])
 
     return data
 
@@ -257,6 +366,11 @@ def _validate_planner_output(data: Dict[str, Any], max_actions: int) -> Dict[str
 # Executor
 # ---------------------------------------------------------------------
 
+_APP_KEYS = frozenset({"front_app", "frontmost_app"})
+_TITLE_KEYS = frozenset({"window_title", "front_window_title"})
+_OUTPUT_DEFAULTS: Dict[str, Any] = {"number": 0.0, "boolean": False}
+
+
 class MacOSAXDesktopExecutor:
     """
     macOS desktop executor.
@@ -287,39 +401,43 @@ class MacOSAXDesktopExecutor:
             "max_actions": self.planner_cfg.max_actions,
         }
 
-        return self.caller.call_json(
+        key = _PLAN_CACHE.key(self.planner_cfg.model, PLANNER_SYSTEM, payload)
+        cached = _PLAN_CACHE.get(key)
+        if cached is not None:
+            return cached
+
+        plan = self.caller.call_json(
             cfg=JSONCallConfig(model=self.planner_cfg.model, retries=2, strict_schema=True),
             system=PLANNER_SYSTEM,
             user_content=json.dumps(payload, ensure_ascii=False),
             schema_name="DesktopActionPlan",
-            json_schema=DesktopActionPlan.model_json_schema(),
+            json_schema=_DESKTOP_PLAN_SCHEMA,
             validator=lambda d: _validate_planner_output(d, self.planner_cfg.max_actions),
-            extra_repair_instructions=(
-                "Return ONLY JSON. Keep action count <= max_actions. "
-                "All letter keys in keystroke must be lowercase unless SHIFT is explicitly included."
-            ),
+            extra_repair_instructions="Return ONLY JSON. Keep action count <= max_actions.",
         )
+        # call_json only returns once the validator has passed
+        _PLAN_CACHE.put(key, plan)
+        return plan
 
     def _make_outputs(self, step: Step) -> Dict[str, Any]:
         """
         Best-effort outputs. Only produce what we can reasonably observe.
         """
-        out: Dict[str, Any] = {}
         schema = step.outputs_schema or {}
-        front_app = _frontmost_app_name()
+        need_title = any(k in _TITLE_KEYS for k in schema)
+        need_app = need_title or any(k in _APP_KEYS for k in schema)
+        front_app = _frontmost_app_name() if need_app else ""
+        title = _front_window_title(front_app) if need_title else ""
+
+        out: Dict[str, Any] = {}
         for k, typ in schema.items():
-            if k in ("front_app", "frontmost_app"):
+            if k in _APP_KEYS:
                 out[k] = front_app
-            elif k in ("window_title", "front_window_title"):
-                out[k] = _front_window_title(front_app)
+            elif k in _TITLE_KEYS:
+                out[k] = title
             else:
                 # we can't reliably read arbitrary UI state without OCR/AX traversal
-                if typ == "number":
-                    out[k] = 0.0
-                elif typ == "boolean":
-                    out[k] = False
-                else:
-                    out[k] = ""
+                out[k] = _OUTPUT_DEFAULTS.get(typ, "")
         return out
 
     def run(self, step: Step) -> Dict[str, Any]:
@@ -343,12 +461,17 @@ class MacOSAXDesktopExecutor:
         return self._make_outputs(step)
 
     def _run_action(self, action: Dict[str, Any], app_name: Optional[str]) -> None:
+        self._dispatch_action(action, app_name)
+        # Helpers wait on observable UI state; the plan's sleep is extra time the planner asked for.
+        sleep_s = action.get("sleep")
+        if sleep_s is not None:
+            time.sleep(max(0.0, float(sleep_s)))
+
+    def _dispatch_action(self, action: Dict[str, Any], app_name: Optional[str]) -> None:
         t = action.get("type")
-        sleep_s = float(action.get("sleep", 0.05))
 
         if t == "spotlight_open":
             _spotlight_open()
-            time.sleep(max(0.0, sleep_s))
             return
 
         if t == "spotlight_launch":
@@ -356,7 +479,6 @@ class MacOSAXDesktopExecutor:
             if not q:
                 raise ValueError("spotlight_launch requires query")
             _spotlight_launch(str(q))
-            time.sleep(max(0.0, sleep_s))
             return
 
         if t == "activate_app":
@@ -364,7 +486,6 @@ class MacOSAXDesktopExecutor:
             if not app:
                 raise ValueError("activate_app requires app")
             _activate_app(str(app))
-            time.sleep(max(0.0, sleep_s))
             return
 
         if t == "keystroke":
@@ -372,7 +493,6 @@ class MacOSAXDesktopExecutor:
             if not isinstance(keys, list) or not keys:
                 raise ValueError("keystroke requires keys array")
             _keystroke([str(k) for k in keys])
-            time.sleep(max(0.0, sleep_s))
             return
 
         if t == "type_text":
@@ -380,7 +500,6 @@ class MacOSAXDesktopExecutor:
             if txt is None:
                 raise ValueError("type_text requires text")
             _type_text(str(txt))
-            time.sleep(max(0.0, sleep_s))
             return
 
         if t == "paste_text":
@@ -388,7 +507,6 @@ class MacOSAXDesktopExecutor:
             if txt is None:
                 raise ValueError("paste_text requires text")
             _paste_text(str(txt))
-            time.sleep(max(0.0, sleep_s))
             return
 
         if t == "set_focused_value":
@@ -401,7 +519,7 @@ class MacOSAXDesktopExecutor:
             if focused is None:
                 raise AXError("No focused UI element")
             _ax_set_value(focused, str(val))
-            time.sleep(max(0.0, sleep_s))
+            time.sleep(_SETTLE_FLOOR_S)
             return
 
         if t == "press_focused":
@@ -411,7 +529,7 @@ class MacOSAXDesktopExecutor:
             if focused is None:
                 raise AXError("No focused UI element")
             _ax_press(focused)
-            time.sleep(max(0.0, sleep_s))
+            time.sleep(_SETTLE_FLOOR_S)
             return
 
         raise ValueError(f"Unsupported action type: {t}")
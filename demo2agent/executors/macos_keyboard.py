@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+# Quartz keyboard events are posted straight to the HID event tap: no AppleScript,
+# no System Events round trip, and no "uppercase letter means SHIFT" quirk.
+from Quartz import (
+    CGEventCreateKeyboardEvent,
+    CGEventKeyboardSetUnicodeString,
+    CGEventPost,
+    CGEventSetFlags,
+    kCGEventFlagMaskAlternate,
+    kCGEventFlagMaskCommand,
+    kCGEventFlagMaskControl,
+    kCGEventFlagMaskShift,
+    kCGHIDEventTap,
+)
+
+
+MODIFIER_FLAGS: Dict[str, int] = {
+    "CMD": kCGEventFlagMaskCommand,
+    "COMMAND": kCGEventFlagMaskCommand,
+    "CTRL": kCGEventFlagMaskControl,
+    "CONTROL": kCGEventFlagMaskControl,
+    "ALT": kCGEventFlagMaskAlternate,
+    "OPTION": kCGEventFlagMaskAlternate,
+    "SHIFT": kCGEventFlagMaskShift,
+}
+
+# Virtual keycodes (ANSI layout)
+KEYCODES: Dict[str, int] = {
+    "a": 0, "s": 1, "d": 2, "f": 3, "h": 4, "g": 5, "z": 6, "x": 7, "c": 8, "v": 9,
+    "b": 11, "q": 12, "w": 13, "e": 14, "r": 15, "y": 16, "t": 17,
+    "1": 18, "2": 19, "3": 20, "4": 21, "6": 22, "5": 23, "=": 24, "9": 25, "7": 26,
+    "-": 27, "8": 28, "0": 29, "]": 30, "o": 31, "u": 32, "[": 33, "i": 34, "p": 35,
+    "l": 37, "j": 38, "'": 39, "k": 40, ";": 41, "\\": 42, ",": 43, "/": 44,
+    "n": 45, "m": 46, ".": 47, "`": 50,
+    "return": 36, "enter": 36, "tab": 48, "space": 49, "delete": 51, "backspace": 51,
+    "escape": 53, "esc": 53, "forwarddelete": 117,
+    "home": 115, "end": 119, "pageup": 116, "pagedown": 121,
+    "left": 123, "right": 124, "down": 125, "up": 126,
+    "f1": 122, "f2": 120, "f3": 99, "f4": 118, "f5": 96, "f6": 97,
+    "f7": 98, "f8": 100, "f9": 101, "f10": 109, "f11": 103, "f12": 111,
+}
+
+
+def parse_keys(keys: List[str]) -> Tuple[int, int]:
+    """
+    ["CMD","SHIFT","n"] -> (flags, keycode). Letter case is ignored; SHIFT is only
+    applied when listed explicitly.
+    """
+    flags = 0
+    keycode = None
+    for k in keys:
+        flag = MODIFIER_FLAGS.get(k.upper())
+        if flag is not None:
+            flags |= flag
+            continue
+        keycode = KEYCODES.get(k.lower())
+        if keycode is None:
+            raise ValueError(f"Unknown key: {k!r}")
+    if keycode is None:
+        raise ValueError("keystroke requires a non-modifier key")
+    return flags, keycode
+
+
+def post_keystroke(keys: List[str]) -> None:
+    flags, keycode = parse_keys(keys)
+    for down in (True, False):
+        ev = CGEventCreateKeyboardEvent(None, keycode, down)
+        CGEventSetFlags(ev, flags)
+        CGEventPost(kCGHIDEventTap, ev)
+
+
+# CGEventKeyboardSetUnicodeString carries at most 20 UTF-16 units per event
+_UNICODE_CHUNK = 20
+
+
+def _utf16_chunks(text: str):
+    chunk, n = [], 0
+    for ch in text:
+        w = 2 if ord(ch) > 0xFFFF else 1
+        if n + w > _UNICODE_CHUNK:
+            yield "".join(chunk), n
+            chunk, n = [], 0
+        chunk.append(ch)
+        n += w
+    if chunk:
+        yield "".join(chunk), n
+
+
+def type_unicode(text: str) -> None:
+    """
+    Type text as Unicode payloads (up to 20 UTF-16 units per event), independent
+    of the active keyboard layout and modifier state.
+    """
+    for chunk, n in _utf16_chunks(text):
+        for down in (True, False):
+            ev = CGEventCreateKeyboardEvent(None, 0, down)
+            CGEventSetFlags(ev, 0)
+            CGEventKeyboardSetUnicodeString(ev, n, chunk)
+            CGEventPost(kCGHIDEventTap, ev)
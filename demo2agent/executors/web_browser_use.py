@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import asyncio
+import atexit
+import threading
 from typing import Any, Dict
 
 from demo2agent.models import Step
@@ -17,12 +19,29 @@ class BrowserUseWebExecutor:
 
     def __init__(self, use_cloud: bool = False):
         self.use_cloud = use_cloud
+        # One event loop + browser for all steps; asyncio.run() per step would
+        # rebuild both every time.
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._browser = None
+        self._llm = None
+        atexit.register(self.close)
+
+    def _ensure_session(self):
+        from browser_use import Browser, ChatBrowserUse
+
+        if self._browser is None:
+            # keep_alive: agents must not close the shared browser when they finish
+            self._browser = Browser(keep_alive=True)
+        if self._llm is None:
+            self._llm = ChatBrowserUse()
+        return self._browser, self._llm
 
     async def _run_async(self, step: Step) -> Dict[str, Any]:
-        from browser_use import Agent, Browser, ChatBrowserUse
+        from browser_use import Agent
 
-        browser = Browser()
-        llm = ChatBrowserUse()
+        browser, llm = self._ensure_session()
 
         OutputModel = step.output_model()
 
@@ -70,4 +89,23 @@ class BrowserUseWebExecutor:
         # )
 
     def run(self, step: Step) -> Dict[str, Any]:
-        return asyncio.run(self._run_async(step))
+        return asyncio.run_coroutine_threadsafe(self._run_async(step), self._loop).result()
+
+    async def _close_async(self) -> None:
+        if self._browser is not None:
+            try:
+                await self._browser.kill()
+            finally:
+                self._browser = None
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+        if self._loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(self._close_async(), self._loop).result(timeout=10)
+            except Exception:
+                pass
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+        self._loop.close()
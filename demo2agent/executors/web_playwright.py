@@ -1,9 +1,42 @@
 from __future__ import annotations
+import atexit
+import threading
 from typing import Any, Dict
 from demo2agent.models import Step
 from playwright.sync_api import sync_playwright
 
+_ALL_PRESENT_JS = "(sels) => sels.every((s) => document.querySelector(s) !== null)"
+_EXTRACT_JS = """(sels) => Object.fromEntries(Object.entries(sels).map(
+    ([k, s]) => [k, (document.querySelector(s)?.innerText || '').trim()]))"""
+
 class PlaywrightWebExecutor:
+    # One Chromium per process; each step only opens a page.
+    _pw = None
+    _browser = None
+    _ctx = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _context(cls):
+        with cls._lock:
+            if cls._ctx is None:
+                cls._pw = sync_playwright().start()
+                cls._browser = cls._pw.chromium.launch(headless=False)
+                cls._ctx = cls._browser.new_context()
+                atexit.register(cls._shutdown)
+            return cls._ctx
+
+    @classmethod
+    def _shutdown(cls) -> None:
+        with cls._lock:
+            try:
+                if cls._browser is not None:
+                    cls._browser.close()
+                if cls._pw is not None:
+                    cls._pw.stop()
+            finally:
+                cls._pw = cls._browser = cls._ctx = None
+
     def run(self, step: Step) -> Dict[str, Any]:
         """
         Minimal: supports a common pattern:
@@ -16,14 +49,15 @@ class PlaywrightWebExecutor:
             raise ValueError("PlaywrightWebExecutor requires inputs.url")
 
         out: Dict[str, Any] = {}
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=False)
-            page = browser.new_page()
-            page.goto(url, wait_until="domcontentloaded")
-
-            for field, selector in extract_css.items():
-                el = page.locator(selector).first
-                out[field] = (el.inner_text(timeout=5000) or "").strip()
+        page = self._context().new_page()
+        try:
+            # Only the extracted selectors matter; don't wait for the whole DOM.
+            page.goto(url, wait_until="commit")
 
-            browser.close()
+            if extract_css:
+                # One CDP round trip for all fields instead of one per selector.
+                page.wait_for_function(_ALL_PRESENT_JS, arg=list(extract_css.values()), timeout=5000)
+                out.update(page.evaluate(_EXTRACT_JS, extract_css))
+        finally:
+            page.close()
         return out
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import copy
+import functools
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+from demo2agent.util import read_json, write_json
+
+
+def _cache_root() -> Path:
+    return Path(os.environ.get("DEMO2AGENT_CACHE_DIR") or (Path.home() / ".cache" / "demo2agent"))
+
+
+@functools.lru_cache(maxsize=256)
+def _load(path: str) -> Any:
+    # FileNotFoundError propagates and is not memoized, so later writes are seen.
+    return read_json(Path(path))
+
+
+class JsonDiskCache:
+    """
+    Persistent memo for deterministic LLM calls: the same model + prompt + payload
+    yields the same JSON, so repeat runs skip the API entirely.
+
+    Entries live at <cache root>/<namespace>/<sha256>.json. Setting env_var=off
+    (e.g. DEMO2AGENT_PLAN_CACHE=off) disables lookups and writes.
+    """
+
+    def __init__(self, namespace: str, env_var: Optional[str] = None):
+        self.namespace = namespace
+        self.env_var = env_var
+
+    @property
+    def enabled(self) -> bool:
+        return not (self.env_var and os.environ.get(self.env_var, "").lower() in ("off", "0", "false"))
+
+    def key(self, *parts: Any) -> str:
+        h = hashlib.sha256()
+        for p in parts:
+            h.update(json.dumps(p, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return _cache_root() / self.namespace / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        try:
+            return copy.deepcopy(_load(str(self._path(key))))
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            write_json(tmp, value)
+            os.replace(tmp, path)
+        except OSError:
+            # cache is best-effort
+            return
+        _load.cache_clear()
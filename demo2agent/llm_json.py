@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import json
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 from openai import OpenAI
 
@@ -29,6 +29,30 @@ def _as_input(system: str, user_content: UserContent) -> List[Dict[str, Any]]:
     return [{"role": "system", "content": system}, user_msg]
 
 
+# (id(schema), name, strict) -> (schema, text param). Holding the schema keeps its id
+# from being reused; callers pass module-level constants, so this stays tiny.
+_TEXT_FORMATS: Dict[Tuple[int, Optional[str], bool], Tuple[JsonDict, JsonDict]] = {}
+
+
+def _text_format(schema: JsonDict, name: Optional[str], strict: bool) -> JsonDict:
+    """Build the `text` param once per schema so retries reuse it."""
+    key = (id(schema), name, strict)
+    hit = _TEXT_FORMATS.get(key)
+    if hit is None or hit[0] is not schema:
+        if len(_TEXT_FORMATS) >= 64:
+            _TEXT_FORMATS.clear()
+        hit = (schema, {
+            "format": {
+                "type": "json_schema",
+                "name": name,
+                "strict": strict,
+                "schema": schema,
+            }
+        })
+        _TEXT_FORMATS[key] = hit
+    return hit[1]
+
+
 @dataclass
 class JSONCallConfig:
     model: str
@@ -81,14 +105,7 @@ class LLMJsonCaller:
             "input": _as_input(system, user_content)
         }
         if schema:
-            kwargs["text"] = {
-                "format": {
-                    "type": "json_schema",
-                    "name": schema_name,
-                    "strict": bool(cfg.strict_schema),
-                    "schema": schema,
-                }
-            }
+            kwargs["text"] = _text_format(schema, schema_name, bool(cfg.strict_schema))
 
         # Optional args
         if cfg.max_output_tokens is not None:
@@ -110,7 +127,12 @@ class LLMJsonCaller:
         json_schema: JsonDict | None = None,
         validator: Callable[[JsonDict], Any],
         extra_repair_instructions: Optional[str] = None,
+        preprocess_text: Optional[Callable[[str], str]] = None,
     ) -> Any:
+        """
+        preprocess_text (optional) rewrites the raw output text before json.loads,
+        e.g. a single regex sweep instead of walking the parsed tree.
+        """
         last_err: Optional[Exception] = None
         last_text: Optional[str] = None
 
@@ -151,8 +173,9 @@ class LLMJsonCaller:
 
             if parsed is None:
                 # Fallback: parse output_text
+                raw = preprocess_text(last_text) if preprocess_text else last_text
                 try:
-                    parsed = json.loads(last_text)
+                    parsed = json.loads(raw)
                 except Exception as e:
                     last_err = JSONGuardrailError(f"JSON parse failed: {e}")
                     continue
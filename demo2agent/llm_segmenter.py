@@ -1,15 +1,40 @@
 from __future__ import annotations
 
-import base64
-import json
+import asyncio
+import binascii
+import contextlib
+import dataclasses
+import functools
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import cv2
+from openai import AsyncOpenAI
+
+try:
+    import av
+except ImportError:
+    av = None
+
+# simplejpeg wheels are built against a specific NumPy ABI; a mismatched install
+# fails at import ("size changed"), in which case we stay on cv2.imencode.
+try:
+    import simplejpeg
+except (ImportError, ValueError):
+    simplejpeg = None
 
 from demo2agent.executor_specs import get_executor_specs
-from demo2agent.llm_json import JSONCallConfig, LLMJsonCaller
+from demo2agent.llm_cache import JsonDiskCache
+from demo2agent.llm_json import JSONCallConfig, JSONGuardrailError, LLMJsonCaller
+from demo2agent.util import dumps_json
+
+_SEEK_THRESHOLD_S = 30.0
 
 
 @dataclass
@@ -25,6 +50,13 @@ class SegmenterConfig:
     max_w: int = 900
     jpeg_quality: int = 60
 
+    # Adaptive encoding: nudge quality (up to 3 passes) until the mean JPEG is within
+    # 20% of this size; None keeps jpeg_quality fixed.
+    target_bytes_per_frame: Optional[int] = 45_000
+    # Frames with almost no edges (blank/static screens) are shrunk further.
+    low_detail_max_w: int = 720
+    low_detail_laplacian_var: float = 50.0
+
     # Back-compat CLI fields
     image_max_w: Optional[int] = None
     image_detail: Optional[str] = None  # ignored
@@ -32,6 +64,17 @@ class SegmenterConfig:
     target_min_segments: int = 4
     target_max_segments: int = 12
 
+    # Reuse responses for identical (model, prompt, frames/inputs) on re-segmentation
+    cache_enabled: bool = True
+
+    # Send frames as Files API uploads (file_id) instead of inline base64 data URLs.
+    # Uploads are deleted once segment() returns; a crash mid-run can leave them stored.
+    upload_frames: bool = False
+    upload_concurrency: int = 8
+
+    # One combined visual+alignment call; falls back to two calls if it keeps failing
+    single_pass: bool = False
+
     def __post_init__(self) -> None:
         if self.image_max_w is not None:
             self.max_w = int(self.image_max_w)
@@ -54,7 +97,9 @@ No markdown. No extra keys.
 """
 
 
+@functools.lru_cache(maxsize=1)
 def _executor_catalog_text() -> str:
+    # Pure function of the static executor registry; cache_clear() if specs change.
     specs = get_executor_specs()
     lines: List[str] = []
     for s in specs:
@@ -87,6 +132,27 @@ No markdown. No extra keys.
 """
 
 
+SYSTEM_SEGMENT_AND_ALIGN = """You segment a screen recording into task chunks and align them to automation executors, in one pass.
+
+You will be given:
+- A sequence of sampled frames from a screen recording (each with a timestamp).
+- Optional user text (narration/typed hints).
+- Executor catalog (source of truth), in the first text part.
+
+Produce two results:
+1) visual_segments: where the user's intent or the interaction surface changes.
+   Do not think about executors here and do not over-segment into micro-actions.
+   Prefer 4–12 segments for a ~3 minute workflow.
+2) aligned_segments: the visual segments assigned a surface (WEB | DESKTOP | WAIT | AUTO),
+   merging adjacent segments when a single executor can execute them as ONE bounded task.
+   merge_of lists the visual segment ids each aligned segment covers.
+   Prefer fewer segments (typically 4–10) for ~3 minutes; keep web tasks short and bounded.
+
+Return ONLY JSON with schema provided in response_format.
+No markdown. No extra keys.
+"""
+
+
 def _resize_bgr(bgr, max_w: int):
     h, w = bgr.shape[:2]
     if w <= max_w:
@@ -95,24 +161,23 @@ def _resize_bgr(bgr, max_w: int):
     return cv2.resize(bgr, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
 
 
-def _bgr_to_jpeg_data_url(bgr, quality: int) -> str:
+def _bgr_to_jpeg_bytes(bgr, quality: int) -> bytes:
+    if simplejpeg is not None:
+        # libjpeg-turbo directly, without OpenCV's per-call Mat/param overhead
+        return simplejpeg.encode_jpeg(bgr, quality=int(quality), colorspace="BGR", fastdct=True)
     params = [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)]
     ok, buf = cv2.imencode(".jpg", bgr, params)
     if not ok:
         raise RuntimeError("Failed to encode frame as JPEG")
-    b64 = base64.b64encode(buf.tobytes()).decode("ascii")
-    return f"data:image/jpeg;base64,{b64}"
+    return buf.tobytes()
 
 
-def sample_video_frames(video_path: Path, cfg: SegmenterConfig) -> List[Tuple[float, str]]:
-    cap = cv2.VideoCapture(str(video_path))
-    if not cap.isOpened():
-        raise RuntimeError(f"Failed to open video: {video_path}")
+def _jpeg_data_url(jpeg: bytes) -> str:
+    # b2a_base64 skips b64encode's translate pass; build the URL as bytes, decode once
+    return (b"data:image/jpeg;base64," + binascii.b2a_base64(jpeg, newline=False)).decode("ascii")
 
-    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
-    duration_s = (total_frames / float(fps)) if fps > 0 else 0.0
 
+def _sample_times(duration_s: float, cfg: SegmenterConfig) -> List[float]:
     if cfg.sample_fps is not None:
         step_s = 1.0 / max(0.1, float(cfg.sample_fps))
     else:
@@ -123,20 +188,178 @@ def sample_video_frames(video_path: Path, cfg: SegmenterConfig) -> List[Tuple[fl
     while t <= duration_s and len(times) < int(cfg.max_frames):
         times.append(t)
         t += step_s
+    return times
+
+
+@functools.lru_cache(maxsize=4)
+def _open_container(path: str, mtime_ns: int) -> Tuple[Any, threading.RLock]:
+    # Keyed on mtime so a re-recorded file gets a fresh container (and index).
+    return av.open(path), threading.RLock()
+
+
+@contextlib.contextmanager
+def _borrow_container(video_path: Path):
+    """Long-lived PyAV container per file; containers are not thread-safe, so hold its lock."""
+    container, lock = _open_container(str(video_path), os.stat(video_path).st_mtime_ns)
+    with lock:
+        try:
+            yield container
+        except Exception:
+            # leave no half-consumed demuxer behind
+            _open_container.cache_clear()
+            raise
+
+
+def _decode_frames_av(video_path: Path, cfg: SegmenterConfig) -> List[Tuple[float, Any]]:
+    """
+    One forward walk of the decoder, keeping the first frame at/after each sample
+    time; samples are dense relative to GOPs, so per-sample seeks would only
+    re-decode from keyframes. Only kept frames are scaled/converted to BGR.
+    """
+    out: List[Tuple[float, Any]] = []
+    with _borrow_container(video_path) as container:
+        stream = container.streams.video[0]
+        tb = stream.time_base
+        start_pts = stream.start_time or 0
+        if stream.duration is not None:
+            duration_s = float(stream.duration * tb)
+        else:
+            duration_s = float(container.duration or 0) / av.time_base
+
+        # swscale resizes in the same pass as YUV->BGR, so no full-size BGR
+        # buffer is ever materialized.
+        w, h = stream.codec_context.width, stream.codec_context.height
+        if w > cfg.max_w:
+            w, h = int(cfg.max_w), int(h * cfg.max_w / float(w))
+
+        times = _sample_times(duration_s, cfg)
+        targets = [start_pts + int(ts / tb) for ts in times]
+        if not times:
+            return out
+        # The container may have been walked before, so always rewind; jump straight
+        # to the first sample's keyframe only when it is far into the video.
+        seek_to = targets[0] if times[0] > _SEEK_THRESHOLD_S else start_pts
+        container.seek(seek_to, stream=stream, any_frame=False, backward=True)
+
+        j = 0
+        for frame in container.decode(stream):
+            if frame.pts is None or frame.pts < targets[j]:
+                continue
+            bgr = frame.reformat(width=w, height=h, format="bgr24", interpolation="AREA").to_ndarray()
+            # sparse source frames can satisfy several sample times
+            while j < len(targets) and frame.pts >= targets[j]:
+                out.append((times[j], bgr))
+                j += 1
+            if j >= len(targets):
+                break
+    return out
+
+
+def _decode_frames_cv2(video_path: Path, cfg: SegmenterConfig) -> List[Tuple[float, Any]]:
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise RuntimeError(f"Failed to open video: {video_path}")
 
-    samples: List[Tuple[float, str]] = []
-    for ts in times:
-        frame_idx = int(ts * fps)
-        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-        ok, frame = cap.read()
-        if not ok:
-            continue
-        frame = _resize_bgr(frame, cfg.max_w)
-        img_url = _bgr_to_jpeg_data_url(frame, quality=cfg.jpeg_quality)
-        samples.append((float(ts), img_url))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    duration_s = (total_frames / float(fps)) if fps > 0 else 0.0
 
-    cap.release()
-    return samples
+    # Sample times only increase, so walk forward: grab() skips frames without the
+    # BGR conversion, and retrieve() decodes only the ones we keep. A
+    # CAP_PROP_POS_FRAMES seek would re-decode from the previous keyframe each time.
+    out: List[Tuple[float, Any]] = []
+    cur_idx = 0
+    try:
+        for ts in _sample_times(duration_s, cfg):
+            target_idx = int(ts * fps)
+            while cur_idx < target_idx and cap.grab():
+                cur_idx += 1
+            if cur_idx < target_idx or not cap.grab():
+                break
+            cur_idx += 1
+            ok, frame = cap.retrieve()
+            if not ok:
+                continue
+            out.append((ts, _resize_bgr(frame, cfg.max_w)))
+    finally:
+        cap.release()
+    return out
+
+
+def _shrink_if_low_detail(bgr, cfg: SegmenterConfig):
+    if bgr.shape[1] <= cfg.low_detail_max_w:
+        return bgr
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+    if cv2.Laplacian(gray, cv2.CV_16S).var() >= cfg.low_detail_laplacian_var:
+        return bgr
+    return _resize_bgr(bgr, cfg.low_detail_max_w)
+
+
+def _encode_frames(decoded: List[Tuple[float, Any]], quality: int) -> List[Tuple[float, bytes]]:
+    # Frames are already resized on the decode side; JPEG encoding releases the
+    # GIL, so it scales across threads.
+    def encode(item: Tuple[float, Any]) -> Tuple[float, bytes]:
+        ts, frame = item
+        return float(ts), _bgr_to_jpeg_bytes(frame, quality=quality)
+
+    if len(decoded) < 2:
+        return [encode(x) for x in decoded]
+    with ThreadPoolExecutor(max_workers=min(len(decoded), os.cpu_count() or 1)) as pool:
+        return list(pool.map(encode, decoded))
+
+
+# (path, mtime_ns, size, cfg) -> [(t, jpeg_bytes)] for compile/repair/recompile loops
+_SAMPLE_CACHE: "OrderedDict[Tuple[Any, ...], List[Tuple[float, bytes]]]" = OrderedDict()
+_SAMPLE_CACHE_SIZE = 4
+_SAMPLE_CACHE_LOCK = threading.Lock()
+
+
+def sample_video_frames(video_path: Path, cfg: SegmenterConfig) -> List[Tuple[float, bytes]]:
+    """Returns [(t, jpeg_bytes)]; callers choose data URLs or uploads."""
+    st = os.stat(video_path)
+    key = (str(video_path), st.st_mtime_ns, st.st_size, dataclasses.astuple(cfg))
+    with _SAMPLE_CACHE_LOCK:
+        hit = _SAMPLE_CACHE.get(key)
+        if hit is not None:
+            _SAMPLE_CACHE.move_to_end(key)
+            return list(hit)
+
+    frames = _sample_video_frames(video_path, cfg)
+    with _SAMPLE_CACHE_LOCK:
+        _SAMPLE_CACHE[key] = frames
+        while len(_SAMPLE_CACHE) > _SAMPLE_CACHE_SIZE:
+            _SAMPLE_CACHE.popitem(last=False)
+    return list(frames)
+
+
+def _sample_video_frames(video_path: Path, cfg: SegmenterConfig) -> List[Tuple[float, bytes]]:
+    decoded: Optional[List[Tuple[float, Any]]] = None
+    if av is not None:
+        try:
+            decoded = _decode_frames_av(video_path, cfg)
+        except Exception:
+            decoded = None
+    if decoded is None:
+        decoded = _decode_frames_cv2(video_path, cfg)
+
+    decoded = [(ts, _shrink_if_low_detail(frame, cfg)) for ts, frame in decoded]
+
+    quality = int(cfg.jpeg_quality)
+    encoded = _encode_frames(decoded, quality)
+    target = cfg.target_bytes_per_frame
+    for _ in range(3):
+        if not target or not encoded:
+            break
+        mean = sum(len(b) for _, b in encoded) / len(encoded)
+        if abs(mean - target) <= 0.2 * target:
+            break
+        step = 5 if mean < target else -5
+        new_quality = min(95, max(20, quality + step))
+        if new_quality == quality:
+            break
+        quality = new_quality
+        encoded = _encode_frames(decoded, quality)
+    return encoded
 
 
 # JSON Schemas for response_format
@@ -200,14 +423,30 @@ ALIGNED_SCHEMA: Dict[str, Any] = {
 }
 
 
+SEGMENT_AND_ALIGN_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "additionalProperties": False,
+    "required": ["visual_segments", "aligned_segments"],
+    "properties": {
+        "visual_segments": VISUAL_SCHEMA,
+        "aligned_segments": ALIGNED_SCHEMA,
+    },
+}
+
+
+# Every call here uses strict_schema=True, so types and enums are already enforced by
+# response_format; the per-field re-checks only run with DEMO2AGENT_DEBUG_VALIDATE set.
+_FULL_VALIDATE = bool(os.environ.get("DEMO2AGENT_DEBUG_VALIDATE"))
+
+
 def _validate_visual(d: Dict[str, Any]) -> Dict[str, Any]:
-    # Minimal deterministic checks (schema is already enforced by response_format, this is belt+suspenders)
     segs = d.get("segments")
     if not isinstance(segs, list) or not segs:
         raise ValueError("segments must be a non-empty list")
-    for s in segs:
-        if not isinstance(s.get("t_start"), (int, float)) or not isinstance(s.get("t_end"), (int, float)):
-            raise ValueError("t_start/t_end must be numbers")
+    if _FULL_VALIDATE:
+        for s in segs:
+            if not isinstance(s.get("t_start"), (int, float)) or not isinstance(s.get("t_end"), (int, float)):
+                raise ValueError("t_start/t_end must be numbers")
     return d
 
 
@@ -216,43 +455,168 @@ def _validate_aligned(d: Dict[str, Any]) -> Dict[str, Any]:
     if not isinstance(segs, list) or not segs:
         raise ValueError("segments must be a non-empty list")
     for s in segs:
-        if s.get("surface") not in ("WEB", "DESKTOP", "WAIT", "AUTO"):
+        if _FULL_VALIDATE and s.get("surface") not in ("WEB", "DESKTOP", "WAIT", "AUTO"):
             raise ValueError("invalid surface")
-        if not isinstance(s.get("merge_of"), list) or not s["merge_of"]:
+        # The schema has no minItems, so emptiness is only caught here.
+        if not s["merge_of"]:
             raise ValueError("merge_of must be non-empty list")
     return d
 
 
+def _validate_segment_and_align(d: Dict[str, Any]) -> Dict[str, Any]:
+    _validate_visual(d.get("visual_segments") or {})
+    _validate_aligned(d.get("aligned_segments") or {})
+    return d
+
+
+_SEGMENT_CACHE = JsonDiskCache("segmenter")
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_caller() -> LLMJsonCaller:
+    # One OpenAI client (and its keep-alive connection pool) per process.
+    return LLMJsonCaller()
+
+
 class LLMSegmenter:
     def __init__(self, cfg: SegmenterConfig = SegmenterConfig()):
         self.cfg = cfg
-        self.caller = LLMJsonCaller()
-
-    def _segment_visual(self, video_path: Path, user_text: Optional[str]) -> Dict[str, Any]:
-        frames = sample_video_frames(video_path, self.cfg)
-
+        self.caller = _shared_caller()
+        # frames digest -> file ids, so a single-pass fallback reuses the uploads
+        self._uploaded: Dict[str, List[str]] = {}
+
+    def _cached_call(self, key_parts: Tuple[Any, ...], call: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        if not self.cfg.cache_enabled:
+            return call()
+        key = _SEGMENT_CACHE.key(*key_parts)
+        hit = _SEGMENT_CACHE.get(key)
+        if hit is not None:
+            return hit
+        result = call()
+        _SEGMENT_CACHE.put(key, result)
+        return result
+
+    async def _aupload_frames(self, frames: List[Tuple[float, bytes]]) -> List[str]:
+        # Raw bytes via the Files API (no base64 inflation inside the request JSON),
+        # all in flight at once instead of one round trip per frame.
+        # The async client is scoped to this event loop (asyncio.run closes it after).
+        sem = asyncio.Semaphore(max(1, self.cfg.upload_concurrency))
+        async with AsyncOpenAI() as aclient:
+
+            async def upload(t: float, jpeg: bytes) -> str:
+                async with sem:
+                    f = await aclient.files.create(
+                        file=(f"frame_{t:09.3f}.jpg", jpeg, "image/jpeg"), purpose="vision"
+                    )
+                    return f.id
+
+            return list(await asyncio.gather(*(upload(t, jpeg) for t, jpeg in frames)))
+
+    async def _adelete_files(self, file_ids: List[str]) -> None:
+        sem = asyncio.Semaphore(max(1, self.cfg.upload_concurrency))
+        async with AsyncOpenAI() as aclient:
+
+            async def delete(fid: str) -> None:
+                async with sem:
+                    try:
+                        await aclient.files.delete(fid)
+                    except Exception:
+                        pass  # best-effort; a leftover file only costs storage
+
+            await asyncio.gather(*(delete(fid) for fid in file_ids))
+
+    def _release_uploads(self) -> None:
+        file_ids = [fid for ids in self._uploaded.values() for fid in ids]
+        self._uploaded.clear()
+        if file_ids:
+            asyncio.run(self._adelete_files(file_ids))
+
+    def _image_parts(self, frames: List[Tuple[float, bytes]], digest: str) -> List[Dict[str, Any]]:
+        if not self.cfg.upload_frames:
+            return [{"type": "input_image", "image_url": _jpeg_data_url(jpeg)} for _t, jpeg in frames]
+        file_ids = self._uploaded.get(digest)
+        if file_ids is None:
+            file_ids = self._uploaded[digest] = asyncio.run(self._aupload_frames(frames))
+        return [{"type": "input_image", "file_id": fid} for fid in file_ids]
+
+    def _frames_meta(self, frames: List[Tuple[float, bytes]], user_text: Optional[str]) -> Dict[str, Any]:
         # Keep text small; do not embed base64 images into JSON text.
-        meta = {
+        return {
             "user_text": user_text,
             "target_min_segments": self.cfg.target_min_segments,
             "target_max_segments": self.cfg.target_max_segments,
             "frames": [{"t": t} for (t, _img) in frames],
         }
 
-        content: List[Dict[str, Any]] = [{"type": "input_text", "text": json.dumps(meta, ensure_ascii=False)}]
-        for t, img_url in frames:
-            content.append({"type": "input_text", "text": f"frame_t={t:.3f}"})
-            content.append({"type": "input_image", "image_url": img_url})
+    def _frames_call(
+        self,
+        frames: List[Tuple[float, bytes]],
+        meta: Dict[str, Any],
+        *,
+        system: str,
+        schema_name: str,
+        schema: Dict[str, Any],
+        validator: Callable[[Dict[str, Any]], Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        frames_digest = hashlib.blake2b()
+        for _t, jpeg in frames:
+            frames_digest.update(jpeg)
+
+        digest = frames_digest.hexdigest()
+
+        def call() -> Dict[str, Any]:
+            content: List[Dict[str, Any]] = [{"type": "input_text", "text": dumps_json(meta)}]
+            for (t, _jpeg), image in zip(frames, self._image_parts(frames, digest)):
+                content.append({"type": "input_text", "text": f"frame_t={t:.3f}"})
+                content.append(image)
+            return self.caller.call_json(
+                cfg=JSONCallConfig(model=self.cfg.model, retries=2, strict_schema=True),
+                system=system,
+                user_content=content,
+                schema_name=schema_name,
+                json_schema=schema,
+                validator=validator,
+            )
+
+        # Built inside call() so cache hits skip uploads/base64 entirely.
+        return self._cached_call(
+            (self.cfg.model, system, self.cfg.jpeg_quality, self.cfg.max_w,
+             self.cfg.sample_fps, self.cfg.sample_every_s, meta, digest),
+            call,
+        )
 
-        return self.caller.call_json(
-            cfg=JSONCallConfig(model=self.cfg.model, retries=2, strict_schema=True),
+    def _segment_visual(
+        self,
+        video_path: Path,
+        user_text: Optional[str],
+        frames: Optional[List[Tuple[float, bytes]]] = None,
+    ) -> Dict[str, Any]:
+        if frames is None:
+            frames = sample_video_frames(video_path, self.cfg)
+        return self._frames_call(
+            frames,
+            self._frames_meta(frames, user_text),
             system=SYSTEM_VISUAL,
-            user_content=content,
             schema_name="VisualSegments",
-            json_schema=VISUAL_SCHEMA,
+            schema=VISUAL_SCHEMA,
             validator=_validate_visual,
         )
 
+    def _segment_single_pass(
+        self, frames: List[Tuple[float, bytes]], user_text: Optional[str]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        meta = self._frames_meta(frames, user_text)
+        meta["executor_catalog_text"] = _executor_catalog_text()
+        data = self._frames_call(
+            frames,
+            meta,
+            system=SYSTEM_SEGMENT_AND_ALIGN,
+            schema_name="SegmentsAndAlignment",
+            schema=SEGMENT_AND_ALIGN_SCHEMA,
+            validator=_validate_segment_and_align,
+        )
+        return data["visual_segments"], data["aligned_segments"]
+
     def _align_to_executors(self, visual_segments: Dict[str, Any], user_text: Optional[str]) -> Dict[str, Any]:
         payload = {
             "user_text": user_text,
@@ -260,28 +624,47 @@ class LLMSegmenter:
             "visual_segments": visual_segments,
         }
 
-        return self.caller.call_json(
-            cfg=JSONCallConfig(model=self.cfg.model, retries=2, strict_schema=True),
-            system=SYSTEM_ALIGN,
-            user_content=json.dumps(payload, ensure_ascii=False),
-            schema_name="AlignedSegments",
-            json_schema=ALIGNED_SCHEMA,
-            validator=_validate_aligned,
+        return self._cached_call(
+            (self.cfg.model, SYSTEM_ALIGN, payload),
+            lambda: self.caller.call_json(
+                cfg=JSONCallConfig(model=self.cfg.model, retries=2, strict_schema=True),
+                system=SYSTEM_ALIGN,
+                user_content=dumps_json(payload),
+                schema_name="AlignedSegments",
+                json_schema=ALIGNED_SCHEMA,
+                validator=_validate_aligned,
+            ),
         )
 
     def segment(self, video_path: Path, user_text: Optional[str] = None) -> Dict[str, Any]:
-        visual = self._segment_visual(video_path=video_path, user_text=user_text)
-        return self._align_to_executors(visual_segments=visual, user_text=user_text)
+        frames = sample_video_frames(video_path, self.cfg)
+        try:
+            if self.cfg.single_pass:
+                try:
+                    _visual, aligned = self._segment_single_pass(frames, user_text)
+                    return aligned
+                except JSONGuardrailError:
+                    pass  # combined schema kept failing; fall back to two calls
+            visual = self._segment_visual(video_path=video_path, user_text=user_text, frames=frames)
+            return self._align_to_executors(visual_segments=visual, user_text=user_text)
+        finally:
+            # Deleted only after both paths so the fallback reuses the single-pass uploads.
+            self._release_uploads()
 
     def segment_video(self, video_path: Path, user_text: Optional[str] = None) -> Dict[str, Any]:
         return self.segment(video_path=video_path, user_text=user_text)
 
 
+@functools.lru_cache(maxsize=1)
+def _default_segmenter() -> LLMSegmenter:
+    return LLMSegmenter(cfg=SegmenterConfig())
+
+
 def segment_video(
     video_path: Union[str, Path],
     user_text: Optional[str] = None,
     cfg: Optional[SegmenterConfig] = None,
 ) -> Dict[str, Any]:
     vp = Path(video_path) if not isinstance(video_path, Path) else video_path
-    seg_cfg = cfg or SegmenterConfig()
-    return LLMSegmenter(cfg=seg_cfg).segment(video_path=vp, user_text=user_text)
+    segmenter = LLMSegmenter(cfg=cfg) if cfg is not None else _default_segmenter()
+    return segmenter.segment(video_path=vp, user_text=user_text)
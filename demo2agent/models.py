@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 from typing import Any, Dict, List, Literal, Optional, Tuple, Type, Union, Annotated
 
 from pydantic import BaseModel, Field, create_model, field_validator, ConfigDict
@@ -133,6 +134,23 @@ class WorkflowSpec(BaseModel):
 
     steps: List[Step]
 
+def _construct_step(data: Json) -> Step:
+    d = dict(data)
+    if isinstance(d.get("policy"), dict):
+        d["policy"] = StepPolicy.model_construct(**d["policy"])
+    if isinstance(d.get("evidence"), dict):
+        d["evidence"] = StepEvidence.model_construct(**d["evidence"])
+    d["fallbacks"] = [_construct_step(fb) for fb in (d.get("fallbacks") or [])]
+    return Step.model_construct(**d)
+
+def construct_workflow(data: Json) -> WorkflowSpec:
+    """
+    Build a WorkflowSpec WITHOUT validation, for artifacts our compiler already validated.
+    model_construct does not recurse, so nested models are constructed explicitly.
+    """
+    steps = [_construct_step(s) for s in (data.get("steps") or [])]
+    return WorkflowSpec.model_construct(**{**data, "steps": steps})
+
 _TYPE_MAP: Dict[str, tuple] = {
     "string": (str, Field(default="")),
     "number": (float, Field(default=0.0)),
@@ -145,12 +163,19 @@ def make_output_model(step_id: str, outputs_schema: Dict[str, ValueType]) -> Typ
     Build a Pydantic model class dynamically.
 
     For empty outputs_schema, return a minimal model with ok="" so verification can still work.
+    Memoized per (step_id, schema): create_model is costly and steps are re-rendered
+    (model_copy) on every retry. Field order is kept, so dumps are unchanged.
     """
-    if not outputs_schema:
+    return _make_output_model(step_id, tuple((outputs_schema or {}).items()))
+
+
+@functools.lru_cache(maxsize=None)
+def _make_output_model(step_id: str, frozen_schema: Tuple[Tuple[str, str], ...]) -> Type[BaseModel]:
+    if not frozen_schema:
         return create_model(f"OutputModel_{step_id}", ok=(str, Field(default="")))
 
     fields: Dict[str, tuple] = {}
-    for name, t in outputs_schema.items():
+    for name, t in frozen_schema:
         if t in _TYPE_MAP:
             fields[name] = _TYPE_MAP[t]
         else:
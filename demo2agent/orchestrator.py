@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import functools
 import time
 from typing import Any, Dict, Optional
 
-from jinja2 import Environment, StrictUndefined, TemplateError
+from jinja2 import Environment, StrictUndefined, Template, TemplateError
 from pydantic import BaseModel, ValidationError
 
 from demo2agent.models import WorkflowSpec, Step
@@ -43,10 +44,24 @@ def verify(step: Step, outputs: Dict[str, Any]) -> None:
     #             raise VerificationError(f"{step.id}: url not acceptable: {url}")
 
 
+@functools.lru_cache(maxsize=4096)
+def _get_template(env: Environment, src: str) -> Template:
+    # Keyed on the env object itself, so differently configured envs never share
+    # compiled templates; from_string() would lex/parse/codegen on every call.
+    return env.from_string(src)
+
+
+def _is_template(s: str) -> bool:
+    return "{{" in s or "{%" in s or "{#" in s
+
+
 def render_templates(obj: Any, env: Environment, ctx: Dict[str, Any]) -> Any:
     if isinstance(obj, str):
+        # Literal strings skip the Jinja compile/render entirely.
+        if not _is_template(obj):
+            return obj
         try:
-            return env.from_string(obj).render(ctx)
+            return _get_template(env, obj).render(ctx)
         except TemplateError as e:
             raise RuntimeError(f"Template render failed for '{obj}': {e}") from e
     if isinstance(obj, dict):
@@ -56,6 +71,25 @@ def render_templates(obj: Any, env: Environment, ctx: Dict[str, Any]) -> Any:
     return obj
 
 
+def _has_template(obj: Any) -> bool:
+    if isinstance(obj, str):
+        return _is_template(obj)
+    if isinstance(obj, dict):
+        return any(_has_template(v) for v in obj.values())
+    if isinstance(obj, list):
+        return any(_has_template(v) for v in obj)
+    return False
+
+
+def _needs_render(step: Step) -> bool:
+    return (
+        _has_template(step.goal)
+        or _has_template(step.inputs)
+        or _has_template(step.postconditions)
+        or any(_needs_render(fb) for fb in (step.fallbacks or []))
+    )
+
+
 def _render_step(step: Step, env: Environment, ctx: Dict[str, Any]) -> Step:
     """
     Render templates everywhere a user might write them:
@@ -63,7 +97,10 @@ def _render_step(step: Step, env: Environment, ctx: Dict[str, Any]) -> Step:
       - inputs
       - postconditions
       - fallbacks recursively
+    Steps without any template markup are returned as-is.
     """
+    if not _needs_render(step):
+        return step
     rendered_goal = render_templates(step.goal, env, ctx)
     rendered_inputs = render_templates(step.inputs, env, ctx)
     rendered_post = render_templates(step.postconditions, env, ctx)
@@ -112,8 +149,8 @@ class Orchestrator:
 
     def __init__(
         self,
-        web_exec,
-        desktop_exec,
+        web_exec=None,
+        desktop_exec=None,
         repair_hook=None,
         strict_templates: bool = True,
     ):
@@ -125,6 +162,13 @@ class Orchestrator:
             autoescape=False,
         )
 
+    def _executor_for(self, step: Step):
+        # Executors are optional so callers can skip constructing unused ones.
+        executor = self.web_exec if step.type == "WEB" else self.desktop_exec
+        if executor is None:
+            raise RuntimeError(f"{step.id}: no executor configured for {step.type} steps")
+        return executor
+
     def run(self, wf: WorkflowSpec, inputs: Dict[str, Any]) -> Dict[str, Any]:
         ctx: Dict[str, Any] = {**inputs, "steps": {}}
 
@@ -141,7 +185,7 @@ class Orchestrator:
                             raise RuntimeError(f"{step.id}: WEB step must use executor_hint=browser_use/auto")
                         if not isinstance(step.inputs, dict) or "task" not in step.inputs:
                             raise RuntimeError(f"{step.id}: WEB step.inputs.task is required")
-                        raw_outputs = self.web_exec.run(step)
+                        raw_outputs = self._executor_for(step).run(step)
 
                     elif step.type == "DESKTOP":
                         if step.executor_hint not in ("desktop_ax", "auto"):
@@ -151,7 +195,7 @@ class Orchestrator:
                         # Desktop executor supports either task or actions (legacy).
                         if "task" not in step.inputs and "actions" not in step.inputs:
                             raise RuntimeError(f"{step.id}: DESKTOP needs inputs.task or inputs.actions")
-                        raw_outputs = self.desktop_exec.run(step)
+                        raw_outputs = self._executor_for(step).run(step)
 
                     elif step.type == "WAIT":
                         secs = float(step.inputs.get("seconds", 1.0))
@@ -194,10 +238,8 @@ class Orchestrator:
                         step = _render_step(step0, self.env, ctx)
                         # after repair, do one more immediate attempt (without extending retries)
                         try:
-                            if step.type == "WEB":
-                                raw_outputs = self.web_exec.run(step)
-                            elif step.type == "DESKTOP":
-                                raw_outputs = self.desktop_exec.run(step)
+                            if step.type in ("WEB", "DESKTOP"):
+                                raw_outputs = self._executor_for(step).run(step)
                             elif step.type == "WAIT":
                                 secs = float(step.inputs.get("seconds", 1.0))
                                 time.sleep(max(0.0, secs))
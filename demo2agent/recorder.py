@@ -1,15 +1,26 @@
 from __future__ import annotations
 
+import array
+import functools
+import queue
 import subprocess
 import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass,field
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import pyautogui
 from pynput import keyboard, mouse
 
+try:
+    import sounddevice as sd
+    import soundfile as sf
+except (ImportError, OSError):  # OSError: PortAudio library not found
+    sd = None
+    sf = None
+
 from demo2agent.models import DemoTrace, RawEvent
 from demo2agent.util import iso_now, ensure_dir
 from demo2agent.screen_record import ScreenRecorder, ScreenRecordConfig
@@ -19,10 +30,113 @@ import sys
 import signal
 
 
+# pynput's __str__ builds a new string per event; the enums are finite, so map once.
+_BUTTON_STR: Dict[Any, str] = {b: sys.intern(str(b)) for b in mouse.Button}
+_KEY_STR: Dict[Any, str] = {k: sys.intern(str(k)) for k in keyboard.Key}
+
+
+_MACOS_CONTEXT_SCRIPT = """
+tell application "System Events"
+    set p to first application process whose frontmost is true
+    set t to ""
+    try
+        set t to name of front window of p
+    end try
+    return (name of p) & tab & t
+end tell
+"""
+
+
+# Single-line form for the osascript REPL (first window name, or "" if none).
+_MACOS_CONTEXT_EXPR = (
+    'tell application "System Events" to tell (first application process whose frontmost is true) '
+    'to get name & tab & (item 1 of ((name of every window) & {""}))'
+)
+
+
+class _OsaRepl:
+    """
+    One long-lived `osascript -i` instead of a fork/exec per query. Each query is
+    followed by a sentinel expression; output up to the sentinel is the result.
+    Any timeout or parse failure marks the REPL dead and callers fall back.
+    """
+
+    _SENTINEL = "___END___"
+
+    def __init__(self, timeout_s: float = 1.0):
+        self.timeout_s = timeout_s
+        self._proc = subprocess.Popen(
+            ["osascript", "-i"], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, text=True, bufsize=1,
+        )
+        self._lines: "queue.SimpleQueue[Optional[str]]" = queue.SimpleQueue()
+        threading.Thread(target=self._read_loop, name="demo-recorder-osa", daemon=True).start()
+        self.alive = True
+
+    def _read_loop(self) -> None:
+        for line in self._proc.stdout:
+            self._lines.put(line)
+        self._lines.put(None)
+
+    @staticmethod
+    def _clean(line: str) -> str:
+        line = line.strip()
+        for prefix in (">>", "=>", "?"):
+            if line.startswith(prefix):
+                line = line[len(prefix):].strip()
+        if len(line) >= 2 and line[0] == line[-1] == '"':
+            line = line[1:-1].replace("\\t", "\t").replace('\\"', '"').replace("\\\\", "\\")
+        return line
+
+    def eval(self, expr: str) -> Optional[str]:
+        if not self.alive:
+            return None
+        try:
+            self._proc.stdin.write(f'{expr}\n"{self._SENTINEL}"\n')
+            self._proc.stdin.flush()
+            out: List[str] = []
+            deadline = time.monotonic() + self.timeout_s
+            while True:
+                line = self._lines.get(timeout=max(0.0, deadline - time.monotonic()))
+                if line is None:
+                    raise EOFError("osascript exited")
+                if self._SENTINEL in line:
+                    break
+                cleaned = self._clean(line)
+                if cleaned:
+                    out.append(cleaned)
+            return out[-1] if out else ""
+        except Exception:
+            self.close()
+            return None
+
+    def close(self) -> None:
+        self.alive = False
+        try:
+            self._proc.kill()
+        except Exception:
+            pass
+
+
+def _key_str(key) -> str:
+    try:
+        return _KEY_STR.get(key) or str(key)
+    except TypeError:  # unhashable KeyCode variants
+        return str(key)
+
+
 @dataclass
 class AudioRecordConfig:
     enabled: bool = False
-    # If None, we use a reasonable platform default input.
+    # "sounddevice": in-process PortAudio capture to WAV (no ffmpeg needed).
+    # "ffmpeg": external ffmpeg process using device/codec/container_ext below.
+    backend: str = "sounddevice"
+    samplerate: int = 16000
+    channels: int = 1
+    # sounddevice input device (index or name substring); None = system default
+    input_device: Optional[Any] = None
+
+    # ffmpeg only. If None, we use a reasonable platform default input.
     # If you want explicit devices, set this to the ffmpeg input string you want.
     device: Optional[str] = None
 
@@ -82,20 +196,105 @@ def _start_audio_recording(audio_path: Path, cfg: AudioRecordConfig) -> subproce
         "ffmpeg",
         "-y",
         "-hide_banner",
+        "-nostdin",
         "-loglevel", "error",
         *input_args,
         "-acodec", cfg.codec,
         str(audio_path),
     ]
 
-    return subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # No stdin pipe: shutdown is signalled (SIGINT finalizes the container cleanly).
+    return subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
-def transcribe_audio_openai(audio_path: Path, out_txt_path: Path, model: str = "whisper-1") -> str:
+class _MicRecorder:
     """
-    Transcribe with OpenAI Audio Transcriptions API.
-    Requires: OPENAI_API_KEY environment variable and `openai` installed.
-    Writes plain text transcript to out_txt_path and returns it.
+    PortAudio callback -> queue -> writer thread -> soundfile. The callback only
+    copies the block; disk I/O stays off the audio thread.
+
+    With chunk_s set, the writer also cuts the stream into standalone WAV chunks
+    and hands each finished one to on_chunk, so it can be transcribed while
+    recording continues.
     """
+
+    def __init__(
+        self,
+        audio_path: Path,
+        cfg: AudioRecordConfig,
+        chunk_s: Optional[float] = None,
+        on_chunk: Optional[Callable[[Path], None]] = None,
+    ):
+        self.audio_path = audio_path
+        self.cfg = cfg
+        self.chunk_s = chunk_s
+        self.on_chunk = on_chunk
+        self._q: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._stream = None
+        self._writer: Optional[threading.Thread] = None
+
+    def _callback(self, indata, frames, time_info, status) -> None:
+        self._q.put(indata.copy())
+
+    def _open_wav(self, path: Path):
+        return sf.SoundFile(
+            str(path), mode="w", samplerate=self.cfg.samplerate,
+            channels=self.cfg.channels, subtype="PCM_16",
+        )
+
+    def _write_loop(self, wav) -> None:
+        chunking = bool(self.chunk_s) and self.on_chunk is not None
+        chunk_frames = int(self.chunk_s * self.cfg.samplerate) if chunking else 0
+        chunk_dir = self.audio_path.parent / f"{self.audio_path.stem}_chunks"
+        chunk, n_chunk, n = None, 0, 0
+
+        def finish_chunk() -> None:
+            chunk.close()
+            self.on_chunk(Path(chunk.name))
+
+        with wav:
+            while True:
+                block = self._q.get()
+                if block is None:
+                    break
+                wav.write(block)
+                if not chunking:
+                    continue
+                if chunk is None:
+                    chunk_dir.mkdir(parents=True, exist_ok=True)
+                    chunk = self._open_wav(chunk_dir / f"chunk_{n_chunk:03d}.wav")
+                    n_chunk += 1
+                    n = 0
+                chunk.write(block)
+                n += len(block)
+                if n >= chunk_frames:
+                    finish_chunk()
+                    chunk = None
+        if chunk is not None:
+            finish_chunk()
+
+    def start(self) -> None:
+        self.audio_path.parent.mkdir(parents=True, exist_ok=True)
+        wav = self._open_wav(self.audio_path)
+        self._writer = threading.Thread(target=self._write_loop, args=(wav,), name="demo-recorder-audio", daemon=True)
+        self._writer.start()
+        self._stream = sd.InputStream(
+            samplerate=self.cfg.samplerate, channels=self.cfg.channels, dtype="int16",
+            device=self.cfg.input_device, callback=self._callback,
+        )
+        self._stream.start()
+
+    def stop(self) -> None:
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+        if self._writer is not None:
+            self._q.put(None)
+            self._writer.join()
+            self._writer = None
+
+
+@functools.lru_cache(maxsize=1)
+def _openai_client():
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY is not set; cannot transcribe.")
@@ -105,18 +304,28 @@ def transcribe_audio_openai(audio_path: Path, out_txt_path: Path, model: str = "
     except Exception as e:
         raise RuntimeError("openai package not available; install it to enable transcription.") from e
 
-    client = OpenAI()
+    return OpenAI()
+
 
+def _transcribe_file(audio_path: Path, model: str) -> str:
     with audio_path.open("rb") as f:
         # This call shape matches OpenAI python v1+.
         # If your repo pins a different openai version, adjust accordingly.
-        resp = client.audio.transcriptions.create(
+        resp = _openai_client().audio.transcriptions.create(
             model=model,
             file=f,
             response_format="text",
         )
+    return resp if isinstance(resp, str) else str(resp)
+
 
-    text = resp if isinstance(resp, str) else str(resp)
+def transcribe_audio_openai(audio_path: Path, out_txt_path: Path, model: str = "whisper-1") -> str:
+    """
+    Transcribe with OpenAI Audio Transcriptions API.
+    Requires: OPENAI_API_KEY environment variable and `openai` installed.
+    Writes plain text transcript to out_txt_path and returns it.
+    """
+    text = _transcribe_file(audio_path, model)
     out_txt_path.parent.mkdir(parents=True, exist_ok=True)
     out_txt_path.write_text(text, encoding="utf-8")
     return text
@@ -130,7 +339,7 @@ class RecorderConfig:
     # Window/app context capture
     capture_window_titles: bool = True
     capture_frontmost_app: bool = True
-    context_min_interval_s: float = 0.25  # rate limit expensive calls
+    context_min_interval_s: float = 0.25  # background poll interval for app/title
 
     typed_flush_s: float = 0.6
 
@@ -143,6 +352,9 @@ class RecorderConfig:
 
     transcribe_audio: bool = False
     transcription_model: str = "whisper-1"
+    # In-process audio is transcribed in chunks of this length while recording;
+    # None transcribes the whole file after stop.
+    transcribe_chunk_s: Optional[float] = 15.0
 
 class DemoRecorder:
     def __init__(self, cfg: RecorderConfig):
@@ -151,7 +363,14 @@ class DemoRecorder:
 
         self._t0: Optional[float] = None
         self._stop = threading.Event()
-        self._events: List[RawEvent] = []
+        # ESC calls stop() on the listener thread while run_blocking calls it on the
+        # main thread; teardown must run exactly once.
+        self._teardown_lock = threading.Lock()
+        self._stopped = False
+        # Event columns (SoA); RawEvents are only built once, in _build_events().
+        self._ev_t = array.array("d")
+        self._ev_type: List[str] = []
+        self._ev_data: List[Dict[str, Any]] = []
 
         self._typed_buf: List[str] = []
         self._typed_last_emit: float = 0.0
@@ -159,24 +378,42 @@ class DemoRecorder:
         self._mouse_listener = None
         self._kb_listener = None
 
+        # pynput callbacks only enqueue (time.monotonic(), kind, payload); the consumer
+        # thread does context lookup and appends to the event columns.
+        self._evq: "queue.SimpleQueue[tuple]" = queue.SimpleQueue()
+        self._consumer: Optional[threading.Thread] = None
+
         self._screen: Optional[ScreenRecorder] = None
 
-        # cache for context
-        self._last_context_t: float = -1e9
+        # cache for context, filled by the poller thread
         self._context_cache: Dict[str, Any] = {}
+        self._context_lock = threading.Lock()
+        self._context_thread: Optional[threading.Thread] = None
+        self._osa: Optional[_OsaRepl] = None
         self._audio_proc: Optional[subprocess.Popen] = None
+        self._mic: Optional[_MicRecorder] = None
+        self._transcribe_pool: Optional[ThreadPoolExecutor] = None
+        self._transcribe_futures: List[Future] = []
         self._audio_path: Optional[Path] = None
         self._transcript_path: Optional[Path] = None
 
+    def _add_event(self, t: float, type: str, data: Dict[str, Any]) -> None:
+        self._ev_t.append(t)
+        self._ev_type.append(type)
+        self._ev_data.append(data)
+
+    def _build_events(self) -> List[RawEvent]:
+        return [RawEvent(t=t, type=ty, data=d) for t, ty, d in zip(self._ev_t, self._ev_type, self._ev_data)]
+
     def _now(self) -> float:
         assert self._t0 is not None
-        return time.time() - self._t0
+        return time.monotonic() - self._t0
 
-    def _emit_text_if_needed(self, force: bool = False) -> None:
-        t = self._now()
+    def _emit_text_if_needed(self, force: bool = False, t: Optional[float] = None) -> None:
+        t = self._now() if t is None else t
         if self._typed_buf and (force or (t - self._typed_last_emit) >= self.cfg.typed_flush_s):
             txt = "".join(self._typed_buf)
-            self._events.append(RawEvent(t=t, type="text", data={"text": txt}))
+            self._add_event(t, "text", {"text": txt})
             self._typed_buf = []
             self._typed_last_emit = t
 
@@ -208,17 +445,28 @@ class DemoRecorder:
             pass
         return None
 
-    def _log_context(self) -> None:
-        """
-        Emits context events at most every context_min_interval_s.
-        Stores in event stream as a window_title event with extra fields,
-        but you can also add a new event type if you prefer.
-        """
-        t = self._now()
-        if (t - self._last_context_t) < self.cfg.context_min_interval_s:
-            return
+    def _get_macos_context(self) -> Optional[Tuple[str, str]]:
+        """(app name, front window title) from one osascript query instead of two."""
+        out = self._osa.eval(_MACOS_CONTEXT_EXPR) if self._osa is not None else None
+        if out is None:
+            try:
+                out = subprocess.check_output(["osascript", "-e", _MACOS_CONTEXT_SCRIPT], text=True)
+            except Exception:
+                return None
+        app, _, title = out.rstrip("\n").partition("\t")
+        return app.strip(), title.strip()
 
+    def _read_context(self) -> Dict[str, Any]:
         data: Dict[str, Any] = {}
+        both = self._get_macos_context() if sys.platform == "darwin" else None
+        if both is not None:
+            app, title = both
+            if app and self.cfg.capture_frontmost_app:
+                data["frontmost_app"] = app
+            if title and self.cfg.capture_window_titles:
+                data["title"] = title
+            return data
+
         if self.cfg.capture_frontmost_app:
             app = self._get_frontmost_app_name_macos()
             if app:
@@ -227,86 +475,151 @@ class DemoRecorder:
         title = self._get_active_window_title_best_effort()
         if title:
             data["title"] = title
+        return data
 
-        if data:
-            self._events.append(RawEvent(t=t, type="window_title", data=data))
-            self._context_cache = data
-
-        self._last_context_t = t
+    def _poll_context(self) -> None:
+        """
+        Polls frontmost app / window title every context_min_interval_s off the input
+        path (osascript forks a process). Changes are queued as "context" items so the
+        window_title event lands in order with the input events around it.
+        """
+        last: Dict[str, Any] = {}
+        while not self._stop.is_set():
+            data = self._read_context()
+            if data and data != last:
+                self._evq.put((time.monotonic(), "context", data))
+                last = data
+            self._stop.wait(self.cfg.context_min_interval_s)
 
     def _current_context(self) -> Dict[str, Any]:
         """
         Returns last known context cache (frontmost_app/title) to attach inline to click/key events.
         """
-        return dict(self._context_cache)
+        with self._context_lock:
+            return dict(self._context_cache)
 
     # -------- input handlers --------
 
     def _on_click(self, x, y, button, pressed):
-        if not pressed:
-            return
-        self._emit_text_if_needed(force=True)
+        if pressed:
+            self._evq.put((time.monotonic(), "click", (int(x), int(y), _BUTTON_STR.get(button) or str(button))))
 
-        # capture app context near this action
-        self._log_context()
-        ctx = self._current_context()
-
-        t = self._now()
-        self._events.append(
-            RawEvent(
-                t=t,
-                type="mouse_click",
-                data={
-                    "x": int(x),
-                    "y": int(y),
-                    "button": str(button),
-                    **ctx,
-                },
-            )
-        )
+    def _on_key_down(self, key):
+        self._evq.put((time.monotonic(), "key_down", key))
 
-        if self._screen is not None:
-            self._screen.notify_click(int(x), int(y), t)
+    def _on_key_up(self, key):
+        self._evq.put((time.monotonic(), "key_up", key))
+        if key == keyboard.Key.esc:
+            self.stop()
 
-    def _on_key_down(self, key):
-        # capture app context near typing
-        self._log_context()
-        ctx = self._current_context()
+    # -------- event consumer --------
+
+    _BATCH_MAX = 32
 
+    def _consume(self) -> None:
+        while True:
+            try:
+                batch = [self._evq.get(timeout=0.05)]
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            try:
+                while len(batch) < self._BATCH_MAX:
+                    batch.append(self._evq.get_nowait())
+            except queue.Empty:
+                pass
+
+            ctx = self._current_context()
+            for ts, kind, payload in batch:
+                t = ts - self._t0
+                if kind == "context":
+                    self._add_event(t, "window_title", payload)
+                    with self._context_lock:
+                        self._context_cache = payload
+                    ctx = dict(payload)
+                elif kind == "click":
+                    x, y, button = payload
+                    self._emit_text_if_needed(force=True, t=t)
+                    # copy the batch's ctx and fill in place: no ** merge per event
+                    data = ctx.copy()
+                    data["x"] = x
+                    data["y"] = y
+                    data["button"] = button
+                    self._add_event(t, "mouse_click", data)
+                    if self._screen is not None:
+                        self._screen.notify_click(x, y, t)
+                elif kind == "key_down":
+                    self._handle_typed(payload, t)
+                    data = ctx.copy()
+                    data["key"] = _key_str(payload)
+                    self._add_event(t, "key_down", data)
+                else:
+                    self._add_event(t, "key_up", {"key": _key_str(payload)})
+
+    def _handle_typed(self, key, t: float) -> None:
         try:
             if getattr(key, "char", None) is not None:
                 self._typed_buf.append(key.char)
             elif key == keyboard.Key.space:
                 self._typed_buf.append(" ")
             elif key == keyboard.Key.enter:
-                self._emit_text_if_needed(force=True)
+                self._emit_text_if_needed(force=True, t=t)
             elif key == keyboard.Key.backspace:
                 if self._typed_buf:
                     self._typed_buf.pop()
         except Exception:
             pass
 
-        self._events.append(
-            RawEvent(
-                t=self._now(),
-                type="key_down",
-                data={"key": str(key), **ctx},
-            )
+    # -------- transcription --------
+
+    def _submit_chunk(self, path: Path) -> None:
+        assert self._transcribe_pool is not None
+        self._transcribe_futures.append(
+            self._transcribe_pool.submit(_transcribe_file, path, self.cfg.transcription_model)
         )
 
-    def _on_key_up(self, key):
-        self._events.append(RawEvent(t=self._now(), type="key_up", data={"key": str(key)}))
-        if key == keyboard.Key.esc:
-            self.stop()
+    def _transcribe(self) -> None:
+        assert self._audio_path is not None and self._transcript_path is not None
+        if self._transcribe_pool is None:
+            transcribe_audio_openai(
+                audio_path=self._audio_path,
+                out_txt_path=self._transcript_path,
+                model=self.cfg.transcription_model,
+            )
+            return
+        # chunks were submitted while recording; most are already done by now
+        try:
+            text = " ".join(t.strip() for t in (f.result() for f in self._transcribe_futures) if t.strip())
+        finally:
+            self._transcribe_pool.shutdown(wait=False)
+            self._transcribe_pool = None
+        self._transcript_path.write_text(text, encoding="utf-8")
 
     # -------- lifecycle --------
 
     def start(self) -> None:
-        self._t0 = time.time()
+        self._t0 = time.monotonic()
         self._stop.clear()
+        self._stopped = False
         if self.cfg.record_audio and self.cfg.audio_cfg.enabled:
-            self._audio_path = (self.cfg.out_dir / f"audio.{self.cfg.audio_cfg.container_ext}")
-            self._audio_proc = _start_audio_recording(self._audio_path, self.cfg.audio_cfg)
+            audio_cfg = self.cfg.audio_cfg
+            # Raw PCM to WAV from the default mic needs no encoder, so even with
+            # backend="ffmpeg" record it in-process. An explicit ffmpeg device stays on ffmpeg.
+            in_process = audio_cfg.backend == "sounddevice" or (
+                audio_cfg.codec == "pcm_s16le" and audio_cfg.container_ext == "wav" and not audio_cfg.device
+            )
+            if in_process and sd is not None:
+                self._audio_path = self.cfg.out_dir / "audio.wav"
+                chunk_s = self.cfg.transcribe_chunk_s if self.cfg.transcribe_audio else None
+                if chunk_s:
+                    self._transcribe_pool = ThreadPoolExecutor(max_workers=2)
+                    self._transcribe_futures = []
+                self._mic = _MicRecorder(self._audio_path, audio_cfg, chunk_s=chunk_s, on_chunk=self._submit_chunk)
+                self._mic.start()
+            else:
+                self._audio_path = (self.cfg.out_dir / f"audio.{audio_cfg.container_ext}")
+                self._audio_proc = _start_audio_recording(self._audio_path, audio_cfg)
 
         if self.cfg.record_screen:
             self._screen = ScreenRecorder(
@@ -314,6 +627,19 @@ class DemoRecorder:
             )
             self._screen.start()
 
+        self._consumer = threading.Thread(target=self._consume, name="demo-recorder-events", daemon=True)
+        self._consumer.start()
+        if self.cfg.capture_frontmost_app or self.cfg.capture_window_titles:
+            if sys.platform == "darwin":
+                try:
+                    self._osa = _OsaRepl()
+                except OSError:
+                    self._osa = None
+            self._context_thread = threading.Thread(
+                target=self._poll_context, name="demo-recorder-context", daemon=True
+            )
+            self._context_thread.start()
+
         self._mouse_listener = mouse.Listener(on_click=self._on_click)
         self._kb_listener = keyboard.Listener(on_press=self._on_key_down, on_release=self._on_key_up)
         self._mouse_listener.start()
@@ -321,69 +647,72 @@ class DemoRecorder:
 
     def stop(self) -> None:
         self._stop.set()
+        # A concurrent second caller blocks here until the first finishes teardown.
+        with self._teardown_lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._teardown()
+
+    def _teardown(self) -> None:
         # Stop audio
+        if self._mic is not None:
+            try:
+                self._mic.stop()
+            finally:
+                self._mic = None
         if self._audio_proc is not None:
             try:
-                # Tell ffmpeg to finish cleanly
-                if self._audio_proc.stdin:
-                    try:
-                        self._audio_proc.stdin.write(b"q\n")
-                        self._audio_proc.stdin.flush()
-                    except Exception:
-                        pass
-
-                # Give it a moment then force kill if needed
+                # Tell ffmpeg to finish cleanly, then force kill if needed
+                if sys.platform == "win32":
+                    self._audio_proc.terminate()
+                else:
+                    self._audio_proc.send_signal(signal.SIGINT)
                 try:
                     self._audio_proc.wait(timeout=2)
                 except Exception:
-                    if sys.platform == "win32":
-                        self._audio_proc.terminate()
-                    else:
-                        self._audio_proc.send_signal(signal.SIGINT)
-                    try:
-                        self._audio_proc.wait(timeout=2)
-                    except Exception:
-                        self._audio_proc.kill()
+                    self._audio_proc.kill()
             finally:
                 self._audio_proc = None
 
-        self._emit_text_if_needed(force=True)
         if self._mouse_listener:
             self._mouse_listener.stop()
         if self._kb_listener:
             self._kb_listener.stop()
+        if self._osa is not None:
+            self._osa.close()
+        # drain whatever the listeners queued before stopping
+        if self._consumer is not None and self._consumer is not threading.current_thread():
+            self._consumer.join()
+        self._emit_text_if_needed(force=True)
         if self._screen:
             self._screen.stop()
 
     def run_blocking(self) -> DemoTrace:
         print("Recording... press ESC to stop.")
         self.start()
-        t0 = time.time()
-        while (time.time() - t0) < self.cfg.max_seconds and not self._stop.is_set():
-            time.sleep(0.2)
+        # Blocks in the OS until ESC (stop() sets the event) or max_seconds.
+        self._stop.wait(timeout=self.cfg.max_seconds)
         self.stop()
         w, h = pyautogui.size()
         trace = DemoTrace(
             name=self.cfg.name,
             started_at_iso=iso_now(),
             screen_size=[int(w), int(h)],
-            events=self._events,
+            events=self._build_events(),
         )
-        if self.cfg.transcribe_audio and self._audio_path and self._audio_path.exists():
+        audio_exists = self._audio_path is not None and self._audio_path.exists()
+        if self.cfg.transcribe_audio and audio_exists:
             self._transcript_path = self.cfg.out_dir / "transcript.txt"
             trace.audio_path = str(self._audio_path)
             try:
-                transcribe_audio_openai(
-                    audio_path=self._audio_path,
-                    out_txt_path=self._transcript_path,
-                    model=self.cfg.transcription_model,
-                )
+                self._transcribe()
             except Exception as e:
                 # Don’t fail the whole recording if transcription fails—just log a marker.
-                self._events.append(
+                trace.events.append(
                     RawEvent(t=self._now(), type="marker", data={"transcription_error": str(e)})
                 )
-            if self._audio_path and self._audio_path.exists():
+            if audio_exists:
                 trace.events.append(
                     RawEvent(t=self._now(), type="marker", data={"audio_file": str(self._audio_path)})
                 )
@@ -396,9 +725,7 @@ class DemoRecorder:
 
 
         # Basic sanity warning
-        clicks = [e for e in self._events if e.type == "mouse_click"]
-        keys = [e for e in self._events if e.type == "key_down"]
-        if len(clicks) == 0 and len(keys) == 0:
+        if "mouse_click" not in self._ev_type and "key_down" not in self._ev_type:
             print(
                 "\n[WARNING] No mouse/keyboard events captured. On macOS, enable:\n"
                 "Privacy & Security -> Accessibility AND Input Monitoring\n"
@@ -417,5 +744,9 @@ class DemoRecorder:
                 trace.events.append(
                     RawEvent(t=self._now(), type="marker", data={"keyframes": self._screen.keyframes})
                 )
+            if self._screen.dropped_frames:
+                trace.events.append(
+                    RawEvent(t=self._now(), type="marker", data={"screen_dropped_frames": self._screen.dropped_frames})
+                )
 
         return trace
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import queue
+import sys
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from fractions import Fraction
 from pathlib import Path
 from typing import Optional, List, Tuple
 
@@ -10,9 +14,22 @@ import cv2
 import numpy as np
 from mss import mss
 
+try:
+    import av
+except ImportError:
+    av = None
+
 from demo2agent.util import ensure_dir
 
 
+def _imwrite_params(fmt: str, quality: int) -> List[int]:
+    if fmt == "webp":
+        return [int(cv2.IMWRITE_WEBP_QUALITY), int(quality)]
+    if fmt in ("jpg", "jpeg"):
+        return [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)]
+    return []
+
+
 @dataclass
 class ScreenRecordConfig:
     out_dir: Path
@@ -21,12 +38,19 @@ class ScreenRecordConfig:
     video_name: str = "screen.mp4"
     save_click_keyframes: bool = True
     keyframe_dirname: str = "keyframes"
-    keyframe_half_size: int = 220    # crop around click if you want (optional)
+    keyframe_half_size: int = 220    # crop around the click; 0 keeps the full frame
+    keyframe_format: str = "webp"    # "webp" / "jpg" / "png"
+    keyframe_quality: int = 80       # webp/jpg only
+    # H.264 encoders tried in order (hardware first); cv2 mp4v if none opens or PyAV is missing
+    codecs: Tuple[str, ...] = (
+        ("h264_videotoolbox", "libx264") if sys.platform == "darwin" else ("h264_nvenc", "libx264")
+    )
 
 
 class ScreenRecorder:
     """
-    Records the screen to MP4 using MSS + OpenCV VideoWriter.
+    Records the screen to MP4 using MSS + PyAV (hardware H.264 when available),
+    falling back to OpenCV VideoWriter.
 
     - start(): begins recording
     - stop(): stops recording
@@ -36,20 +60,43 @@ class ScreenRecorder:
         self.cfg = cfg
         ensure_dir(cfg.out_dir)
         self.video_path = cfg.out_dir / cfg.video_name
+        self._kf_dir = cfg.out_dir / cfg.keyframe_dirname
+        if cfg.save_click_keyframes:
+            ensure_dir(self._kf_dir)
 
         self._stop = threading.Event()
         self._thread: Optional[threading.Thread] = None
+        # Capture -> encode hand-off; when the encoder lags, frames are dropped instead
+        # of stretching the capture interval.
+        self._frame_q: "queue.Queue[Optional[Tuple[int, np.ndarray]]]" = queue.Queue(maxsize=max(1, cfg.fps))
+        self._encoder_thread: Optional[threading.Thread] = None
+        self.dropped_frames = 0
 
         self._writer: Optional[cv2.VideoWriter] = None
+        self._container = None  # PyAV output container
+        self._stream = None
+        self._n_frames = 0
         self._size: Optional[Tuple[int, int]] = None  # (w,h)
 
-        self._latest_frame_bgr: Optional[np.ndarray] = None
+        self._latest_frame_bgra: Optional[np.ndarray] = None
         self._latest_frame_lock = threading.Lock()
+        # monitor (left, top, pixels-per-point), to map click coords into the frame
+        self._geometry: Tuple[int, int, float] = (0, 0, 1.0)
+
+        # Keyframe image encoding stays off the input-handling thread.
+        self._kf_pool: Optional[ThreadPoolExecutor] = None
 
         self.keyframes: List[dict] = []
 
     def start(self) -> None:
         self._stop.clear()
+        self._size = None
+        self._n_frames = 0
+        self.dropped_frames = 0
+        self._frame_q = queue.Queue(maxsize=max(1, self.cfg.fps))
+        self._kf_pool = ThreadPoolExecutor(max_workers=1)
+        self._encoder_thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self._encoder_thread.start()
         self._thread = threading.Thread(target=self._loop, daemon=True)
         self._thread.start()
 
@@ -57,6 +104,22 @@ class ScreenRecorder:
         self._stop.set()
         if self._thread:
             self._thread.join(timeout=2.0)
+        if self._encoder_thread:
+            # drains the queued frames, then closes the writer
+            self._encoder_thread.join(timeout=5.0)
+        if self._kf_pool is not None:
+            self._kf_pool.shutdown(wait=True)
+            self._kf_pool = None
+
+    def _close_writer(self) -> None:
+        if self._container is not None:
+            try:
+                for packet in self._stream.encode():  # flush delayed frames
+                    self._container.mux(packet)
+                self._container.close()
+            except Exception:
+                pass
+        self._container = self._stream = None
         if self._writer is not None:
             try:
                 self._writer.release()
@@ -68,19 +131,47 @@ class ScreenRecorder:
         if not self.cfg.save_click_keyframes:
             return
         with self._latest_frame_lock:
-            frame = None if self._latest_frame_bgr is None else self._latest_frame_bgr.copy()
-
-        if frame is None:
+            frame = self._latest_frame_bgra
+        if frame is None or self._kf_pool is None:
             return
 
-        kdir = self.cfg.out_dir / self.cfg.keyframe_dirname
-        ensure_dir(kdir)
-        path = kdir / f"click_{t:.3f}.png"
-        cv2.imwrite(str(path), frame)
+        half = int(self.cfg.keyframe_half_size)
+        if half > 0:
+            left, top, scale = self._geometry
+            cx, cy = int((x - left) * scale), int((y - top) * scale)
+            r = int(half * scale)
+            fh, fw = frame.shape[:2]
+            frame = frame[max(0, cy - r): min(fh, cy + r), max(0, cx - r): min(fw, cx + r)]
+        # Frames are never written in place after capture, so only the (BGR) crop is copied.
+        crop = np.ascontiguousarray(frame[:, :, :3])
+
+        fmt = self.cfg.keyframe_format.lower()
+        path = self._kf_dir / f"click_{t:.3f}.{fmt}"
+        self._kf_pool.submit(cv2.imwrite, str(path), crop, _imwrite_params(fmt, self.cfg.keyframe_quality))
 
         self.keyframes.append({"t": float(t), "path": str(path), "x": int(x), "y": int(y)})
 
+    def _open_av(self, w: int, h: int) -> bool:
+        for codec in self.cfg.codecs:
+            container = av.open(str(self.video_path), mode="w")
+            try:
+                stream = container.add_stream(codec, rate=int(self.cfg.fps))
+                stream.width, stream.height = w, h
+                stream.pix_fmt = "yuv420p"
+                stream.time_base = Fraction(1, int(self.cfg.fps))
+                if codec == "libx264":
+                    stream.options = {"preset": "ultrafast"}
+                stream.codec_context.open()  # fail here, not on the first frame
+            except Exception:
+                container.close()
+                continue
+            self._container, self._stream = container, stream
+            return True
+        return False
+
     def _init_writer(self, w: int, h: int) -> None:
+        if av is not None and self._open_av(w, h):
+            return
         fourcc = cv2.VideoWriter_fourcc(*"mp4v")  # works on mac for .mp4
         self._writer = cv2.VideoWriter(str(self.video_path), fourcc, float(self.cfg.fps), (w, h))
         if not self._writer.isOpened():
@@ -89,29 +180,74 @@ class ScreenRecorder:
                 "On macOS, try: pip install opencv-python-headless OR ensure permissions."
             )
 
+    def _write(self, idx: int, bgra: np.ndarray) -> None:
+        w, h = self._size
+        bgra = bgra[:h, :w]  # even dimensions (yuv420p)
+        if self._container is None:
+            assert self._writer is not None
+            self._writer.write(np.ascontiguousarray(bgra[:, :, :3]))
+            return
+        if bgra.shape[1] != bgra.strides[0] // 4:
+            bgra = np.ascontiguousarray(bgra)  # odd width was cropped
+        # swscale goes BGRA -> YUV420 in one pass; no intermediate BGR frame.
+        frame = av.VideoFrame.from_ndarray(bgra, format="bgra").reformat(format="yuv420p")
+        # pts from the capture slot, so dropped frames don't speed the video up
+        frame.pts = max(idx, self._n_frames)
+        self._n_frames = frame.pts + 1
+        for packet in self._stream.encode(frame):
+            self._container.mux(packet)
+
+    def _encode_loop(self) -> None:
+        try:
+            while True:
+                item = self._frame_q.get()
+                if item is None:
+                    return
+                idx, bgra = item
+                if self._size is None:
+                    # Size from the first grab: on HiDPI displays it is in pixels, not points.
+                    h, w = bgra.shape[:2]
+                    self._size = (w & ~1, h & ~1)
+                    self._init_writer(*self._size)
+                self._write(idx, bgra)
+        finally:
+            self._close_writer()
+
     def _loop(self) -> None:
         interval = 1.0 / max(1, self.cfg.fps)
-        with mss() as sct:
-            monitor = sct.monitors[self.cfg.monitor_index]
-            w = int(monitor["width"])
-            h = int(monitor["height"])
-
-            self._size = (w, h)
-            self._init_writer(w, h)
-
-            while not self._stop.is_set():
-                t0 = time.time()
-
-                img = np.array(sct.grab(monitor))        # BGRA
-                bgr = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
-
-                with self._latest_frame_lock:
-                    self._latest_frame_bgr = bgr
-
-                assert self._writer is not None
-                self._writer.write(bgr)
-
-                dt = time.time() - t0
-                sleep_s = interval - dt
-                if sleep_s > 0:
-                    time.sleep(sleep_s)
+        try:
+            with mss() as sct:
+                monitor = sct.monitors[self.cfg.monitor_index]
+                # Absolute monotonic deadlines: no drift from per-iteration overhead and no
+                # wall-clock jumps.
+                t_start = next_deadline = time.monotonic()
+                while not self._stop.is_set():
+                    # View straight over the grab's raw BGRA bytearray (a fresh one per grab);
+                    # raw.bgra would copy it into bytes first. The encoder takes BGRA as-is.
+                    raw = sct.grab(monitor)
+                    bgra = np.frombuffer(raw.raw, dtype=np.uint8).reshape(raw.height, raw.width, 4)
+
+                    with self._latest_frame_lock:
+                        self._latest_frame_bgra = bgra
+                        self._geometry = (
+                            int(monitor["left"]), int(monitor["top"]), raw.width / float(monitor["width"])
+                        )
+
+                    idx = int(round((time.monotonic() - t_start) / interval))
+                    try:
+                        self._frame_q.put_nowait((idx, bgra))
+                    except queue.Full:
+                        self.dropped_frames += 1
+
+                    next_deadline += interval
+                    delay = next_deadline - time.monotonic()
+                    if delay > 0:
+                        self._stop.wait(delay)
+                    elif delay < -interval:
+                        # fell far behind; resync instead of bursting to catch up
+                        next_deadline = time.monotonic()
+        finally:
+            try:
+                self._frame_q.put(None, timeout=2.0)
+            except queue.Full:
+                pass  # encoder died; nothing left to drain
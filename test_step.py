@@ -15,6 +15,7 @@ import sys
 from pathlib import Path
 import asyncio
 from dotenv import load_dotenv
+from jinja2 import Environment, StrictUndefined
 
 from demo2agent.models import WorkflowSpec, Step
 from demo2agent.util import read_json, write_json
@@ -24,6 +25,10 @@ from demo2agent.executors.desktop_pyautogui import PyAutoGuiDesktopExecutor
 from demo2agent.executors.desktop_macos_notes import MacOSNotesExecutor
 from demo2agent.orchestrator import render_templates
 
+# One environment for the process: render_templates memoizes compiled templates
+# per (env, source), so a fresh env per call would recompile every template.
+_ENV = Environment(undefined=StrictUndefined, autoescape=False)
+
 try:
     from demo2agent.executors.macos_ax_desktop_executor import MacOSAXDesktopExecutor
     AX_EXECUTOR_AVAILABLE = True
@@ -89,16 +94,11 @@ def test_step(
         "inputs": runtime_inputs,
         "steps": previous_outputs or {},
     }
-    from jinja2 import Environment, StrictUndefined, TemplateError
-    env = Environment(
-            undefined=StrictUndefined,
-            autoescape=False,
-        )
     # Render templates in step
     step = step.model_copy(
         update={
-            "goal": render_templates(step.goal, env, ctx),
-            "inputs": render_templates(step.inputs, env, ctx),
+            "goal": render_templates(step.goal, _ENV, ctx),
+            "inputs": render_templates(step.inputs, _ENV, ctx),
         }
     )
     